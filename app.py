@@ -1,27 +1,160 @@
+# Отсчет времени импорта приложения для отчета о запуске; импортируется первым
+from src.utils.startup import IMPORT_STARTED_AT
+
+import asyncio
+import importlib
+import time
+
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse, PlainTextResponse
+from sqlalchemy import text
 from src.Users.router import router as participant_router
-from db import engine, Base
+from src.utils.image_processing import image_worker_pool
+from src.utils.geolocation import geocoding_service
+from src.utils.jobs import job_queue
+from src.Users.manager import user_hash_manager
+from src.Users.discover import discover_engine
+from src.utils.logging import AppLogger, RequestLoggingMiddleware
+from src.utils.metrics import MetricsMiddleware, render_metrics
+from config import settings
+from db import engine, engine_summary, replica_router, Base
 import uvicorn
 
-app = FastAPI(title="ParticipantsApp", version="1.0")
+logger = AppLogger().get_logger()
+
+# Тяжелые модули импортируются при первом использовании; прогрев загружает их
+# до того, как экземпляр объявит себя готовым
+WARMUP_MODULES = ("numpy", "PIL.Image")
+
+app = FastAPI(
+    title="ParticipantsApp", version="1.0", default_response_class=ORJSONResponse
+)
 
 # Подключаем роутеры
 app.include_router(participant_router)
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.LOG_FORMAT == "json":
+    app.add_middleware(
+        RequestLoggingMiddleware,
+        sample_rate=settings.LOG_REQUEST_SAMPLE_RATE,
+        slow_ms=settings.LOG_SLOW_REQUEST_MS,
+    )
+
+
+def web_workers() -> int:
+    """Число процессов uvicorn, запущенных с этим приложением."""
+    return settings.WEB_CONCURRENCY or settings.WEB_WORKERS
+
+
+def check_multi_worker_settings() -> None:
+    """Проверяет, что состояние, которое должно быть общим, не хранится в памяти процесса."""
+    workers = web_workers()
+    if workers <= 1:
+        return
+    if settings.LIKE_QUOTA_BACKEND == "memory":
+        raise RuntimeError(
+            "LIKE_QUOTA_BACKEND=memory считает лайки в каждом процессе отдельно, "
+            f"а воркеров {workers}; используйте LIKE_QUOTA_BACKEND=database"
+        )
+    if settings.GEOCODER_PROVIDER == "nominatim":
+        logger.warning(
+            "JOB_GEOCODE_CONCURRENCY=%s действует в каждом из %s воркеров; "
+            "публичный Nominatim допускает один запрос в секунду",
+            settings.JOB_GEOCODE_CONCURRENCY,
+            workers,
+        )
+
 
 # Инициализация базы данных
 @app.on_event("startup")
 async def on_startup():
-    async with engine.begin() as conn:
-        # Создаем таблицы при запуске приложения, если они еще не существуют
-        await conn.run_sync(Base.metadata.create_all)
+    startup_started_at = time.perf_counter()
+    check_multi_worker_settings()
+    app.state.ready = False
+    app.state.startup_report = {
+        "import_s": round(startup_started_at - IMPORT_STARTED_AT, 3),
+        "create_all": settings.DB_CREATE_ALL,
+    }
+    logger.info(engine_summary(engine))
+    for replica in replica_router.replicas:
+        logger.info("Реплика. " + engine_summary(replica))
+    if settings.DB_CREATE_ALL:
+        async with engine.begin() as conn:
+            # Создаем таблицы при запуске приложения, если они еще не существуют
+            await conn.run_sync(Base.metadata.create_all)
+    image_worker_pool.start()
+    await geocoding_service.start()
+    await replica_router.start()
+    await job_queue.start()
+    app.state.startup_report["startup_s"] = round(
+        time.perf_counter() - startup_started_at, 3
+    )
+    # Прогрев идет в фоне: процесс уже принимает запросы, а /health/ready
+    # отвечает 503, пока пул соединений и воркеры изображений не готовы
+    app.state.warmup_task = asyncio.create_task(warm_up())
+
+
+async def _warm_up_pool() -> None:
+    """Открывает соединения пула заранее, чтобы первые запросы не ждали подключения."""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    count = max(1, min(settings.WARMUP_DB_CONNECTIONS, size))
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            # Все соединения удерживаются одновременно, иначе пул выдаст одно и то же
+            await barrier.wait()
+
+    barrier = asyncio.Barrier(count)
+    await asyncio.gather(*(ping() for _ in range(count)))
+
+
+async def warm_up() -> None:
+    """Прогрев экземпляра; повторяется, пока база данных недоступна."""
+    started_at = time.perf_counter()
+    delay = 0.5
+    while True:
+        try:
+            await _warm_up_pool()
+            await image_worker_pool.warm_up()
+            for module in WARMUP_MODULES:
+                await asyncio.to_thread(importlib.import_module, module)
+            break
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Прогрев не выполнен: %s; повтор через %.1f с", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10.0)
+    report = app.state.startup_report
+    report["warmup_s"] = round(time.perf_counter() - started_at, 3)
+    report["ready_after_s"] = round(time.perf_counter() - IMPORT_STARTED_AT, 3)
+    app.state.ready = True
+    logger.info(
+        "Экземпляр готов: импорт %.3f с, запуск %.3f с, прогрев %.3f с",
+        report["import_s"],
+        report["startup_s"],
+        report["warmup_s"],
+        extra={"startup": report},
+    )
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
     # Здесь можно добавить код для завершения соединений и очистки ресурсов при выключении приложения
-    pass
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    # Фоновые задачи используют пул изображений и геокодер, поэтому останавливаются первыми
+    await job_queue.close()
+    image_worker_pool.shutdown()
+    await geocoding_service.close()
+    user_hash_manager.shutdown()
+    await discover_engine.close()
+    await replica_router.close()
 
 
 # Добавляем редирект с корневого пути на /docs
@@ -30,5 +163,32 @@ async def redirect_to_docs():
     return RedirectResponse(url="/docs")
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики в текстовом формате Prometheus."""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/health/live", include_in_schema=False)
+async def health_live():
+    """Процесс запущен и обрабатывает запросы."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", include_in_schema=False)
+async def health_ready():
+    """Экземпляр прогрет и готов принимать трафик; до этого — 503."""
+    if not getattr(app.state, "ready", False):
+        return ORJSONResponse({"status": "warming_up"}, status_code=503)
+    return {"status": "ready", "startup": app.state.startup_report}
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    options = {"host": "0.0.0.0", "port": 8000, "workers": web_workers()}
+    if settings.LOG_FORMAT == "json":
+        # Журнал uvicorn идет через общую очередь, журнал доступа пишет RequestLoggingMiddleware
+        options.update(log_config=None, access_log=False)
+    # При нескольких воркерах uvicorn импортирует приложение в каждом процессе по строке
+    uvicorn.run("app:app", **options)
@@ -0,0 +1,60 @@
+"""
+Сравнение скалярного calculate_distance с векторизованным calculate_distances.
+
+Запуск: python -m benchmarks.bench_distance [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.utils.distance import calculate_distance, within_radius_mask
+
+BASE_LAT, BASE_LON = 55.7558, 37.6173
+MAX_DISTANCE_KM = 50.0
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(size: int, repeat: int) -> None:
+    rng = np.random.default_rng(42)
+    lats = rng.uniform(41.0, 70.0, size)
+    lons = rng.uniform(20.0, 60.0, size)
+    lat_list, lon_list = lats.tolist(), lons.tolist()
+
+    def scalar():
+        return [
+            calculate_distance(BASE_LAT, BASE_LON, lat, lon) <= MAX_DISTANCE_KM
+            for lat, lon in zip(lat_list, lon_list)
+        ]
+
+    def vectorized():
+        return within_radius_mask(BASE_LAT, BASE_LON, lats, lons, MAX_DISTANCE_KM)
+
+    assert np.array_equal(np.array(scalar()), vectorized())
+
+    scalar_time = _best_of(scalar, repeat)
+    vector_time = _best_of(vectorized, repeat)
+    print(
+        f"{size:>9} точек: scalar {scalar_time * 1000:9.2f} мс, "
+        f"numpy {vector_time * 1000:8.2f} мс, ускорение x{scalar_time / vector_time:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.repeat)
@@ -0,0 +1,72 @@
+"""
+Пропускная способность хэширования паролей при регистрации и отзывчивость event loop.
+
+Сравнивает синхронный hash_password в корутине (как раньше в /create)
+с hash_password_async, выполняемым в пуле потоков.
+
+Запуск: python -m benchmarks.bench_hashing [--signups 64] [--concurrency 16] [--workers 2]
+"""
+
+import argparse
+import asyncio
+import time
+
+from argon2 import PasswordHasher
+
+from config import settings
+from src.Users.manager import UserHashManager, argon2_parameters
+
+TICK_INTERVAL = 0.005
+
+
+async def _measure_loop_lag(stop: asyncio.Event) -> float:
+    """Максимальная задержка срабатывания таймера event loop в секундах."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_INTERVAL)
+        worst = max(worst, time.perf_counter() - started - TICK_INTERVAL)
+    return worst
+
+
+async def run(
+    manager: UserHashManager, signups: int, concurrency: int, use_async: bool
+):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def signup(i: int):
+        async with semaphore:
+            if use_async:
+                await manager.hash_password_async(f"password-{i}")
+            else:
+                manager.hash_password(f"password-{i}")
+                await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(signup(i) for i in range(signups)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    worst_lag = await lag_task
+
+    mode = "async (пул потоков)" if use_async else "sync (в event loop)"
+    print(
+        f"{mode:22} {signups / elapsed:8.1f} регистраций/с, "
+        f"макс. задержка event loop {worst_lag * 1000:8.1f} мс"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--signups", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    parser.add_argument("--profile", default=settings.ARGON2_PROFILE)
+    args = parser.parse_args()
+
+    hasher = PasswordHasher.from_parameters(argon2_parameters(args.profile))
+    manager = UserHashManager(hasher, max_workers=args.workers)
+    for use_async in (False, True):
+        asyncio.run(run(manager, args.signups, args.concurrency, use_async))
+    manager.shutdown()
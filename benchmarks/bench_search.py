@@ -0,0 +1,106 @@
+"""
+Поиск по имени: ILIKE '%...%' (фильтры first_name/last_name) против индексного поиска q=.
+
+Заполняет временную базу SQLite (или PostgreSQL по --database-url, таблицы
+пересоздаются) участниками со случайными именами и сравнивает время запросов.
+
+Запуск: python -m benchmarks.bench_search [--rows 1000000] [--queries 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+SYLLABLES = "ан ва ле ми ко ра ни ст ол ег да ри на то се ма ли ев ов ин".split()
+
+
+def _name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+async def seed(rows: int, batch_size: int, rng: random.Random) -> None:
+    from sqlalchemy import insert
+
+    from db import Base, engine
+    from src.Users.models import Participant
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        batch = []
+        for i in range(rows):
+            batch.append(
+                {
+                    "gender": "Мужчина",
+                    "first_name": _name(rng),
+                    "last_name": _name(rng),
+                    "email": f"search-{i}@example.com",
+                    "hashed_password": "-",
+                }
+            )
+            if len(batch) >= batch_size:
+                await conn.execute(insert(Participant), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(Participant), batch)
+
+
+async def _timed(queries, run) -> np.ndarray:
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        await run(query)
+        timings.append(time.perf_counter() - started)
+    return np.array(timings) * 1000
+
+
+async def main(args: argparse.Namespace) -> None:
+    from db import async_session
+    from src.Users.crud import ParticipantCRUD
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    await seed(args.rows, args.batch_size, rng)
+    print(f"Заполнение {args.rows} строк: {time.perf_counter() - started:.1f} с")
+
+    queries = [_name(rng)[: rng.randint(3, 5)] for _ in range(args.queries)]
+    async with async_session() as db:
+
+        async def ilike(query):
+            await ParticipantCRUD.get_participants(
+                db, first_name=query, limit=args.limit
+            )
+
+        async def search(query):
+            await ParticipantCRUD.search_participants(db, query, args.limit)
+
+        for name, run in (("ILIKE", ilike), ("поиск q=", search)):
+            timings = await _timed(queries, run)
+            print(
+                f"{name:10} среднее {timings.mean():8.2f} мс, "
+                f"p95 {np.percentile(timings, 95):8.2f} мс"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="participants-search-") as workdir:
+        # Настройки задаются до импорта модулей приложения
+        os.environ["DATABASE_URL"] = args.database_url or (
+            f"sqlite+aiosqlite:///{os.path.join(workdir, 'search.db')}"
+        )
+        os.environ["DB_PROFILE"] = "prod"
+        asyncio.run(main(args))
@@ -0,0 +1,163 @@
+"""
+Сериализация больших страниц /list: прежний путь против быстрого.
+
+Прежний путь: ORM-объекты, ParticipantResponse с полной валидацией на каждую
+строку (включая EmailStr), повторная проверка по response_model и json.dumps,
+как это делает FastAPI для JSONResponse. Быстрый путь: строки с колонками
+ответа, словари без моделей и orjson. Дополнительно измеряется GET /list
+целиком через ASGI-клиент.
+
+Запуск: python -m benchmarks.bench_serialization [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+
+async def seed(rows: int, rng: random.Random) -> None:
+    from sqlalchemy import insert
+
+    from db import Base, engine
+    from src.Users.models import Participant
+
+    now = datetime.utcnow().replace(microsecond=0)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            insert(Participant),
+            [
+                {
+                    "gender": rng.choice(("Мужчина", "Женщина")),
+                    "first_name": f"Имя{i}",
+                    "last_name": f"Фамилия{i}",
+                    "email": f"user-{i}@example.com",
+                    "hashed_password": "-",
+                    "latitude": f"{rng.uniform(41, 70):.6f}",
+                    "longitude": f"{rng.uniform(20, 180):.6f}",
+                    "city": "Москва",
+                    "created_at": now - timedelta(seconds=rows - i),
+                }
+                for i in range(rows)
+            ],
+        )
+
+
+def _rate(rows: int, timings: list) -> str:
+    seconds = np.array(timings)
+    return (
+        f"{rows / seconds.mean():12,.0f} строк/с "
+        f"(среднее {seconds.mean() * 1000:8.1f} мс, min {seconds.min() * 1000:8.1f} мс)"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    import httpx
+    import orjson
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from app import app
+    from config import settings
+    from db import async_session
+    from src.Users.crud import RESPONSE_COLUMNS
+    from src.Users.models import Participant
+    from src.Users.schemas import (
+        ParticipantListResponse,
+        ParticipantResponse,
+        participant_payload,
+    )
+
+    await seed(args.rows, random.Random(args.seed))
+    response_adapter = TypeAdapter(ParticipantListResponse)
+
+    def avatar_url(participant_id: int) -> str:
+        return f"{settings.BASE_URL}/api/clients/avatar/{participant_id}"
+
+    async def validated():
+        async with async_session() as db:
+            result = await db.execute(select(Participant).limit(args.rows))
+            participants = result.scalars().all()
+        response = ParticipantListResponse(
+            items=[
+                ParticipantResponse.model_validate(
+                    participant_payload(p, avatar_url(p.id))
+                )
+                for p in participants
+            ],
+            next_cursor=None,
+        )
+        content = response_adapter.dump_python(
+            response_adapter.validate_python(response), mode="json"
+        )
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode()
+
+    async def fast():
+        async with async_session() as db:
+            result = await db.execute(select(*RESPONSE_COLUMNS).limit(args.rows))
+            rows = result.all()
+        return orjson.dumps(
+            {
+                "items": [participant_payload(row, avatar_url(row.id)) for row in rows],
+                "next_cursor": None,
+            }
+        )
+
+    # Оба пути должны давать одинаковый JSON
+    assert json.loads(await validated()) == json.loads(await fast())
+
+    for name, run in (("ORM + модели + json", validated), ("строки + orjson", fast)):
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            await run()
+            timings.append(time.perf_counter() - started)
+        print(f"{name:22} {_rate(args.rows, timings)}")
+
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                response = await client.get(
+                    "/api/clients/list", params={"limit": args.rows}
+                )
+                timings.append(time.perf_counter() - started)
+                assert len(response.json()["items"]) == args.rows
+            print(f"{'GET /list':22} {_rate(args.rows, timings)}")
+    finally:
+        await app.router.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="participants-serialization-") as workdir:
+        # Настройки задаются до импорта модулей приложения
+        os.environ["DATABASE_URL"] = (
+            f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}"
+        )
+        os.environ["DB_PROFILE"] = "prod"
+        os.environ["LIST_MAX_PAGE_SIZE"] = str(args.rows)
+        os.environ["BLOB_STORE_PATH"] = os.path.join(workdir, "avatars")
+        os.environ["GEOCODE_CACHE_PATH"] = ""
+        os.environ["METRICS_ENABLED"] = "false"
+        asyncio.run(main(args))
@@ -0,0 +1,132 @@
+"""
+Время холодного старта: импорт приложения и запуск uvicorn до готовности.
+
+Импорт измеряется в отдельных процессах (python -c "import app"), чтобы модули
+не оставались в кеше интерпретатора; отдельно измеряется стоимость тяжелых
+модулей, которые приложение импортирует при первом использовании. Затем
+uvicorn запускается против базы, подготовленной alembic, с DB_CREATE_ALL=false,
+и замеряется время до ответа 200 от /health/live и /health/ready.
+
+Запуск: python -m benchmarks.bench_startup [--repeat 5] [--workers 1]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ("numpy", "PIL.Image", "httpx", "rich.logging")
+
+
+def _timed_import(statement: str, env: dict) -> float:
+    code = (
+        "import time; started = time.perf_counter(); "
+        f"{statement}; print(time.perf_counter() - started)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, check=True, capture_output=True
+    )
+    return float(output.stdout.decode().split()[-1])
+
+
+def _summary(timings: list) -> str:
+    seconds = np.array(timings)
+    return (
+        f"среднее {seconds.mean() * 1000:8.1f} мс, min {seconds.min() * 1000:8.1f} мс"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float = 60.0) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(url)
+
+
+def measure_serving(env: dict, workers: int) -> tuple:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app:app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        live = _wait_for(f"{base_url}/health/live") - started
+        ready = _wait_for(f"{base_url}/health/ready") - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return live, ready
+
+
+def main(args: argparse.Namespace, env: dict) -> None:
+    timings = [_timed_import("import app", env) for _ in range(args.repeat)]
+    print(f"{'import app':24} {_summary(timings)}")
+    for module in LAZY_MODULES:
+        timings = [_timed_import(f"import {module}", env) for _ in range(args.repeat)]
+        print(f"{'  отложено: ' + module:24} {_summary(timings)}")
+
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    live, ready = zip(*(measure_serving(env, args.workers) for _ in range(args.repeat)))
+    print(f"{'до /health/live':24} {_summary(live)}")
+    print(f"{'до /health/ready':24} {_summary(ready)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="participants-startup-") as workdir:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}",
+            DB_PROFILE="prod",
+            DB_CREATE_ALL="false",
+            BLOB_STORE_PATH=os.path.join(workdir, "avatars"),
+            GEOCODE_CACHE_PATH="",
+            LOG_FORMAT="json",
+            LOG_LEVEL="WARNING",
+        )
+        main(args, env)
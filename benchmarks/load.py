@@ -0,0 +1,390 @@
+"""
+Нагрузочный прогон API участников на синтетической базе.
+
+Заполняет базу (SQLite во временном каталоге или PostgreSQL по --database-url)
+участниками с координатами, графом лайков и небольшими аватарами, затем
+выполняет запросы к /create, /list (с фильтром по расстоянию и без него),
+/{id}/match и /avatar/{id} через ASGI-клиент в том же процессе с заданной
+параллельностью. Геокодирование идет через офлайн-справочник, сеть не нужна.
+
+Результат — JSON с p50/p95/p99 задержки, пропускной способностью и пиковым RSS
+по каждому сценарию, пригодный для сравнения прогонов между коммитами.
+
+Запуск: python -m benchmarks.load [--participants 10000] [--requests 500]
+        [--concurrency 16] [--output result.json]
+
+Внимание: с --database-url таблицы в указанной базе пересоздаются.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SCENARIOS = ("create", "list", "list_distance", "match", "avatar")
+
+# Офлайн-справочник городов для геокодирования
+CITIES = [
+    ("Москва", 55.7558, 37.6173),
+    ("Санкт-Петербург", 59.9343, 30.3351),
+    ("Новосибирск", 55.0084, 82.9357),
+    ("Екатеринбург", 56.8389, 60.6057),
+    ("Казань", 55.7961, 49.1064),
+    ("Нижний Новгород", 56.2965, 43.9361),
+    ("Самара", 53.1959, 50.1002),
+    ("Ростов-на-Дону", 47.2357, 39.7015),
+    ("Краснодар", 45.0355, 38.9753),
+    ("Владивосток", 43.1155, 131.8855),
+    ("Тверь", 56.8587, 35.9176),
+    ("Калининград", 54.7104, 20.4522),
+]
+# Разброс координат участников вокруг центра города, в градусах
+CITY_SPREAD_DEG = 0.3
+AVATAR_COUNT = 16
+
+
+def _peak_rss_mb() -> float:
+    """Пиковый RSS процесса и его дочерних процессов (пул изображений) в МБ."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # В Linux ru_maxrss в КБ, в macOS — в байтах
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round((own + children) / scale, 1)
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _configure_environment(args: argparse.Namespace, workdir: str) -> None:
+    """Настройки приложения задаются до импорта его модулей."""
+    gazetteer = os.path.join(workdir, "gazetteer.csv")
+    with open(gazetteer, "w", encoding="utf-8") as f:
+        f.write("name,latitude,longitude\n")
+        for name, lat, lon in CITIES:
+            f.write(f"{name},{lat},{lon}\n")
+
+    os.environ.update(
+        {
+            "DATABASE_URL": args.database_url
+            or f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}",
+            "BLOB_STORE_PATH": os.path.join(workdir, "media"),
+            "GEOCODER_PROVIDER": "gazetteer",
+            "GEOCODER_GAZETTEER_PATH": gazetteer,
+            "GEOCODE_CACHE_PATH": "",
+            "ARGON2_PROFILE": args.argon2_profile,
+            "IMAGE_WORKER_MODE": args.image_worker_mode,
+            "MAX_LIKES_PER_DAY": str(10**9),
+            "DB_PROFILE": "prod",
+        }
+    )
+
+
+def _avatar_png(rng: random.Random, size: int = 96) -> bytes:
+    from PIL import Image
+
+    image = Image.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3)))
+    result = io.BytesIO()
+    image.save(result, format="PNG")
+    return result.getvalue()
+
+
+async def seed(args: argparse.Namespace, rng: random.Random) -> dict:
+    """Создает схему и заполняет базу синтетическими участниками и лайками."""
+    from sqlalchemy import insert
+
+    from db import Base, engine
+    from src.Users.manager import user_hash_manager
+    from src.Users.models import Match, Participant
+    from src.utils.blob_store import get_blob_store
+    from src.utils.distance import geo_cell
+    from src.utils.image_processing import _process_avatar_sync
+    from config import settings
+
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    # Небольшой набор аватаров, общий для всех участников
+    store = get_blob_store()
+    avatars = []
+    for _ in range(AVATAR_COUNT):
+        processed = _process_avatar_sync(
+            _avatar_png(rng), settings.AVATAR_SIZES, settings.AVATAR_FORMATS
+        )
+        avatars.append(
+            (store.put(processed.original), store.put_many(processed.variants))
+        )
+
+    hashed_password = user_hash_manager.hash_password("bench-password")
+    now = datetime.utcnow()
+    batch = []
+    async with engine.begin() as conn:
+        for i in range(1, args.participants + 1):
+            city, city_lat, city_lon = rng.choice(CITIES)
+            lat = city_lat + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG)
+            lon = city_lon + rng.uniform(-CITY_SPREAD_DEG, CITY_SPREAD_DEG)
+            avatar_key, avatar_variants = avatars[i % AVATAR_COUNT]
+            batch.append(
+                {
+                    "avatar_key": avatar_key,
+                    "avatar_variants": avatar_variants,
+                    "gender": rng.choice(["Мужчина", "Женщина"]),
+                    "first_name": f"Имя{i}",
+                    "last_name": f"Фамилия{i % 1000}",
+                    "email": f"seed-{i}@example.com",
+                    "hashed_password": hashed_password,
+                    "latitude": str(lat),
+                    "longitude": str(lon),
+                    "city": city,
+                    "lat": lat,
+                    "lon": lon,
+                    "geo_cell": geo_cell(lat, lon),
+                    "created_at": now - timedelta(seconds=args.participants - i),
+                }
+            )
+            if len(batch) >= args.seed_batch_size:
+                await conn.execute(insert(Participant), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(Participant), batch)
+
+        # Граф лайков: в среднем --likes-per-user исходящих лайков за последние двое суток
+        likes = set()
+        for _ in range(args.participants * args.likes_per_user):
+            user_id = rng.randint(1, args.participants)
+            target_user_id = rng.randint(1, args.participants)
+            if user_id != target_user_id:
+                likes.add((user_id, target_user_id))
+        rows = [
+            {
+                "user_id": user_id,
+                "target_user_id": target_user_id,
+                "created_at": now - timedelta(seconds=rng.randint(0, 2 * 24 * 60 * 60)),
+            }
+            for user_id, target_user_id in likes
+        ]
+        for start in range(0, len(rows), args.seed_batch_size):
+            await conn.execute(
+                insert(Match), rows[start : start + args.seed_batch_size]
+            )
+
+    return {
+        "participants": args.participants,
+        "likes": len(likes),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def _request_factory(scenario: str, args: argparse.Namespace, rng: random.Random):
+    """Возвращает функцию, выполняющую i-й запрос сценария через клиент."""
+    avatar = _avatar_png(rng)
+
+    async def create(client, i):
+        city = rng.choice(CITIES)[0]
+        return await client.post(
+            "/api/clients/create",
+            data={
+                "gender": "Женщина",
+                "first_name": f"Bench{i}",
+                "last_name": "Load",
+                "email": f"bench-{i}@example.com",
+                "password": "bench-password",
+                "city": city,
+            },
+            files={"avatar": ("avatar.png", avatar, "image/png")},
+        )
+
+    async def list_plain(client, i):
+        return await client.get(
+            "/api/clients/list",
+            params={"sort_by_date": rng.random() < 0.5, "limit": args.page_size},
+        )
+
+    async def list_distance(client, i):
+        _, lat, lon = rng.choice(CITIES)
+        return await client.get(
+            "/api/clients/list",
+            params={
+                "distance": args.distance_km,
+                "base_lat": lat + rng.uniform(-0.1, 0.1),
+                "base_lon": lon + rng.uniform(-0.1, 0.1),
+                "limit": args.page_size,
+            },
+        )
+
+    async def match(client, i):
+        user_id = rng.randint(1, args.participants)
+        target = rng.randint(1, args.participants)
+        return await client.post(
+            f"/api/clients/{target}/match", json={"user_id": user_id}
+        )
+
+    async def avatar_request(client, i):
+        size = rng.choice([None, 64, 256])
+        params = {"size": size} if size else {}
+        return await client.get(
+            f"/api/clients/avatar/{rng.randint(1, args.participants)}",
+            params=params,
+            headers={"Accept": "image/webp,image/*"},
+        )
+
+    return {
+        "create": create,
+        "list": list_plain,
+        "list_distance": list_distance,
+        "match": match,
+        "avatar": avatar_request,
+    }[scenario]
+
+
+async def run_scenario(client, scenario: str, args: argparse.Namespace, rng) -> dict:
+    request = _request_factory(scenario, args, rng)
+    latencies = np.zeros(args.requests)
+    statuses = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request(client, i)
+            latencies[i] = time.perf_counter() - started
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "latency_ms": {
+            "p50": round(p50, 2),
+            "p95": round(p95, 2),
+            "p99": round(p99, 2),
+            "max": round(latencies.max() * 1000, 2),
+        },
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+async def main(args: argparse.Namespace) -> dict:
+    import logging
+
+    import httpx
+
+    from app import app
+
+    # Журнал приложения в консоль искажает замеры
+    logging.getLogger("participant_app").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+
+    seeding = await seed(args, rng)
+    await app.router.startup()
+    results = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            for scenario in args.scenarios:
+                results[scenario] = await run_scenario(
+                    client, scenario, args, random.Random(f"{args.seed}-{scenario}")
+                )
+                print(
+                    f"{scenario:14} {results[scenario]['throughput_rps']:8.1f} rps, "
+                    f"p95 {results[scenario]['latency_ms']['p95']:8.2f} мс",
+                    file=sys.stderr,
+                )
+    finally:
+        await app.router.shutdown()
+
+    from db import engine
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "database": engine.url.get_backend_name(),
+        "parameters": {
+            key: getattr(args, key)
+            for key in (
+                "participants",
+                "likes_per_user",
+                "requests",
+                "concurrency",
+                "page_size",
+                "distance_km",
+                "seed",
+                "argon2_profile",
+                "image_worker_mode",
+            )
+        },
+        "seed": seeding,
+        "scenarios": results,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--participants", type=int, default=10_000)
+    parser.add_argument("--likes-per-user", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--distance-km", type=float, default=25.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seed-batch-size", type=int, default=5_000)
+    parser.add_argument(
+        "--database-url", help="База для прогона, например postgresql+asyncpg://..."
+    )
+    parser.add_argument("--argon2-profile", default="default")
+    parser.add_argument(
+        "--image-worker-mode", choices=["process", "thread"], default="process"
+    )
+    parser.add_argument(
+        "--output", help="Файл для JSON-результата (по умолчанию stdout)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="participants-bench-") as workdir:
+        _configure_environment(args, workdir)
+        report = asyncio.run(main(args))
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
@@ -1,10 +1,122 @@
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./test.db"
+    # Реплики для чтения: стратегия "round_robin" или "least_connections"
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STRATEGY: str = "round_robin"
+    DB_REPLICA_HEALTH_INTERVAL: float = 10.0
+    # Сколько секунд после записи клиент читает из основной базы
+    DB_READ_YOUR_WRITES_WINDOW: float = 5.0
+    # Профиль движка БД ("dev" или "prod") и переопределения его параметров
+    DB_PROFILE: str = "prod"
+    DB_ECHO: Optional[bool] = None
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None
+    DB_POOL_RECYCLE: Optional[int] = None
+    DB_POOL_PRE_PING: Optional[bool] = None
+    # PRAGMA для SQLite; None — значение SQLite по умолчанию
+    SQLITE_JOURNAL_MODE: Optional[str] = "WAL"
+    SQLITE_SYNCHRONOUS: Optional[str] = "NORMAL"
+    SQLITE_MMAP_SIZE: Optional[int] = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: Optional[int] = -64 * 1024  # Отрицательное значение — в КиБ
+    SQLITE_BUSY_TIMEOUT: Optional[int] = 5000
+    # Размер кэша подготовленных запросов asyncpg
+    ASYNCPG_STATEMENT_CACHE_SIZE: int = 100
+    # Журнал: "rich" — цветной вывод для разработки, "json" — JSON-строки через очередь
+    LOG_FORMAT: str = "rich"
+    LOG_LEVEL: str = "INFO"
+    # Уровни отдельных логгеров, например {"sqlalchemy.engine": "WARNING"}
+    LOG_LEVELS: Dict[str, str] = {}
+    LOG_QUEUE_SIZE: int = 10_000
+    # Не больше LOG_RATE_LIMIT записей из одного места кода за LOG_RATE_LIMIT_INTERVAL секунд
+    LOG_RATE_LIMIT: int = 20
+    LOG_RATE_LIMIT_INTERVAL: float = 10.0
+    # Доля запросов в журнале доступа; ошибки и медленные запросы пишутся всегда
+    LOG_REQUEST_SAMPLE_RATE: float = 1.0
+    LOG_SLOW_REQUEST_MS: float = 1000.0
+    # Создание таблиц при запуске; в production схемой управляет Alembic
+    DB_CREATE_ALL: bool = True
+    # Соединения, открываемые при прогреве пула до готовности (/health/ready)
+    WARMUP_DB_CONNECTIONS: int = 4
+    # Число процессов uvicorn при запуске через python app.py; WEB_CONCURRENCY
+    # задает его при запуске через uvicorn (например, в Dockerfile)
+    WEB_WORKERS: int = 1
+    WEB_CONCURRENCY: Optional[int] = None
+    # Метрики HTTP-запросов и SQL для эндпоинта /metrics
+    METRICS_ENABLED: bool = True
     MAX_LIKES_PER_DAY: int = 10
+    # Лимит лайков: "memory" — счетчики в памяти процесса, "database" — COUNT в БД
+    LIKE_QUOTA_BACKEND: str = "memory"
+    LIKE_QUOTA_BUCKETS: int = 96
+    LIKE_QUOTA_MAX_USERS: int = 100_000
     BASE_URL: str = "http://127.0.0.1:8000"
+    # Кэш поиска участников по расстоянию
+    NEARBY_CACHE_TTL: float = 60.0
+    NEARBY_CACHE_MAXSIZE: int = 1024
+    NEARBY_CACHE_COORD_PRECISION: int = 3
+    # Размер страницы списка участников
+    LIST_PAGE_SIZE: int = 50
+    LIST_MAX_PAGE_SIZE: int = 500
+    # Версия таблицы для ETag списков перечитывается из БД не чаще раза в столько секунд
+    CHANGE_VERSION_TTL: float = 1.0
+    # Кэш сериализованных ответов /list по фильтрам и версии; 0 — отключен
+    LIST_RESPONSE_CACHE_SIZE: int = 256
+    LIST_RESPONSE_CACHE_TTL: float = 5 * 60
+    # Лента кандидатов /discover: радиус по умолчанию, размер сканирования и очереди
+    DISCOVER_DISTANCE_KM: float = 50.0
+    DISCOVER_PAGE_SIZE: int = 20
+    DISCOVER_SCAN_SIZE: int = 200
+    DISCOVER_QUEUE_SIZE: int = 100
+    DISCOVER_MAX_FEEDS: int = 10_000
+    DISCOVER_FEED_TTL: float = 30 * 60
+    # Размер пачки строк при потоковой выгрузке участников
+    EXPORT_BATCH_SIZE: int = 1000
+    # Хранилище аватаров
+    BLOB_STORE_BACKEND: str = "local"
+    BLOB_STORE_PATH: str = "./media/avatars"
+    AVATAR_CACHE_MAX_AGE: int = 24 * 60 * 60
+    # Производные аватара, создаваемые при загрузке (помимо исходного размера)
+    AVATAR_SIZES: List[int] = [64, 256]
+    AVATAR_FORMATS: List[str] = ["webp", "jpeg"]
+    # Пул обработки изображений: "process" или "thread"
+    IMAGE_WORKER_MODE: str = "process"
+    IMAGE_WORKERS: Optional[int] = None
+    IMAGE_MAX_PENDING: int = 32
+    IMAGE_QUEUE_TIMEOUT: float = 5.0
+    # Геокодирование: "nominatim" или офлайн-справочник "gazetteer" (CSV)
+    GEOCODER_PROVIDER: str = "nominatim"
+    NOMINATIM_URL: str = "https://nominatim.openstreetmap.org/search"
+    GEOCODER_USER_AGENT: str = "ParticipantsApp/1.0"
+    GEOCODER_TIMEOUT: float = 5.0
+    GEOCODER_GAZETTEER_PATH: str = "./gazetteer.csv"
+    GEOCODE_CACHE_PATH: Optional[str] = "./geocode_cache.db"
+    GEOCODE_CACHE_TTL: float = 30 * 24 * 60 * 60
+    GEOCODE_NEGATIVE_CACHE_TTL: float = 24 * 60 * 60
+    # Параметры хэширования паролей Argon2
+    ARGON2_PROFILE: str = "default"
+    ARGON2_TIME_COST: Optional[int] = None
+    ARGON2_MEMORY_COST: Optional[int] = None
+    ARGON2_PARALLELISM: Optional[int] = None
+    PASSWORD_HASH_WORKERS: int = 2
+    # Массовый импорт участников; эндпоинт импорта выключен, пока не задан токен
+    IMPORT_BATCH_SIZE: int = 500
+    IMPORT_ADMIN_TOKEN: Optional[str] = None
+    IMPORT_AVATAR_ROOT: str = "./import/avatars"
+    # Фоновые задачи после регистрации (обработка аватара, геокодирование)
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_LEASE_SECONDS: float = 5 * 60
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_DELAY: float = 2.0
+    JOB_RETRY_MAX_DELAY: float = 10 * 60
+    JOB_SHUTDOWN_TIMEOUT: float = 10.0
+    JOB_AVATAR_CONCURRENCY: int = 2
+    # Nominatim допускает не больше одного запроса в секунду. Ограничение действует
+    # в каждом процессе: при нескольких воркерах запросов к провайдеру больше
+    JOB_GEOCODE_CONCURRENCY: int = 1
 
     class Config:
         env_file = ".env"
@@ -1,13 +1,169 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import Request, Response
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-import os
+from config import settings
+from src.utils.logging import AppLogger
+from src.utils.metrics import db_pool_checkout_wait, instrument_engine
+
+logger = AppLogger().get_logger()
 
 # Настройка строки подключения к базе данных
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+DATABASE_URL = settings.DATABASE_URL
+
+# Профили движка: "dev" — журнал SQL и минимальный пул, "prod" — без журнала,
+# с проверкой и пересозданием соединений
+DB_PROFILES = {
+    "dev": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 0,
+        "pool_timeout": 30.0,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+    },
+    "prod": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 20,
+        "pool_timeout": 10.0,
+        "pool_recycle": 30 * 60,
+        "pool_pre_ping": True,
+    },
+}
+
+
+def engine_options(profile: str = "prod") -> dict:
+    """Параметры create_async_engine из профиля с переопределениями из настроек DB_*."""
+    try:
+        options = dict(DB_PROFILES[profile])
+    except KeyError:
+        raise ValueError(f"Неизвестный профиль базы данных: {profile}")
+    overrides = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+    return options
+
+
+def sqlite_pragmas() -> dict:
+    """PRAGMA, выполняемые на каждом новом соединении SQLite."""
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+    }
+    return {k: v for k, v in pragmas.items() if v is not None}
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий ожидание свободного соединения."""
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started_at)
+
+
+def create_engine_from_settings(database_url: str = DATABASE_URL) -> AsyncEngine:
+    """Создает асинхронный движок по профилю DB_PROFILE и настройкам драйвера."""
+    url = make_url(database_url)
+    options = engine_options(settings.DB_PROFILE)
+    connect_args = {}
+
+    # Для базы SQLite в памяти SQLAlchemy использует StaticPool без параметров пула
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+            options.pop(key)
+    elif settings.METRICS_ENABLED:
+        options["poolclass"] = TimedQueuePool
+
+    if url.get_driver_name() == "asyncpg":
+        # Кэш подготовленных запросов asyncpg; 0 отключает его (нужно для pgbouncer)
+        connect_args["statement_cache_size"] = settings.ASYNCPG_STATEMENT_CACHE_SIZE
+        url = url.update_query_dict(
+            {
+                "prepared_statement_cache_size": str(
+                    settings.ASYNCPG_STATEMENT_CACHE_SIZE
+                )
+            }
+        )
+
+    if settings.LOG_FORMAT == "json" and options.get("echo"):
+        # echo добавляет собственный синхронный обработчик SQLAlchemy; в режиме JSON
+        # журнал SQL идет через общую очередь
+        options["echo"] = False
+        sql_logger = logging.getLogger("sqlalchemy.engine")
+        # Уровень, заданный в LOG_LEVELS, не переопределяем
+        if sql_logger.level == logging.NOTSET:
+            sql_logger.setLevel(logging.INFO)
+
+    new_engine = create_async_engine(url, connect_args=connect_args, **options)
+
+    if url.get_backend_name() == "sqlite":
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    if settings.METRICS_ENABLED:
+        instrument_engine(new_engine.sync_engine)
+    return new_engine
+
+
+def engine_summary(target: AsyncEngine) -> str:
+    """Строка с действующими настройками движка для журнала при запуске."""
+    url = target.url
+    parts = [
+        f"profile={settings.DB_PROFILE}",
+        f"url={url.render_as_string(hide_password=True)}",
+        f"echo={target.echo}",
+        f"pool={type(target.pool).__name__}",
+    ]
+    if hasattr(target.pool, "size"):
+        options = engine_options(settings.DB_PROFILE)
+        parts += [
+            f"{key}={options[key]}"
+            for key in (
+                "pool_size",
+                "max_overflow",
+                "pool_timeout",
+                "pool_recycle",
+                "pool_pre_ping",
+            )
+        ]
+    if url.get_backend_name() == "sqlite":
+        parts.append(
+            "pragmas=" + ",".join(f"{k}={v}" for k, v in sqlite_pragmas().items())
+        )
+    elif url.get_driver_name() == "asyncpg":
+        parts.append(f"statement_cache_size={settings.ASYNCPG_STATEMENT_CACHE_SIZE}")
+    return "База данных: " + " ".join(parts)
+
 
 # Создаем асинхронный движок базы данных
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_engine_from_settings()
 
 # Создаем базовый класс для моделей
 Base = declarative_base()
@@ -18,8 +174,143 @@ async_session = sessionmaker(
 )
 
 
-async def get_db():
-    """Получение сессии базы данных."""
+class ReplicaRouter:
+    """
+    Выбор реплики для чтения: round_robin или least_connections среди реплик,
+    прошедших проверку доступности. Без доступных реплик чтение идет в основную базу.
+    """
+
+    def __init__(
+        self,
+        replicas: List[AsyncEngine],
+        strategy: str = "round_robin",
+        health_interval: float = 10.0,
+    ):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Неизвестная стратегия выбора реплики: {strategy}")
+        self.replicas = replicas
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self.healthy = [True] * len(replicas)
+        self.active = [0] * len(replicas)
+        self._next = 0
+        self._health_task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[int]:
+        """Индекс реплики для нового сеанса чтения или None — читать из основной базы."""
+        candidates = [i for i, healthy in enumerate(self.healthy) if healthy]
+        if not candidates:
+            return None
+        if self.strategy == "least_connections":
+            return min(candidates, key=lambda i: self.active[i])
+        self._next += 1
+        return candidates[self._next % len(candidates)]
+
+    async def check(self) -> None:
+        """Проверяет доступность каждой реплики запросом SELECT 1."""
+        for i, replica in enumerate(self.replicas):
+            try:
+                async with replica.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), 5.0)
+                healthy = True
+            except Exception as e:
+                healthy = False
+                if self.healthy[i]:
+                    logger.warning(
+                        "Реплика %s недоступна: %s",
+                        replica.url.render_as_string(hide_password=True),
+                        e,
+                    )
+            self.healthy[i] = healthy
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.health_interval)
+
+    async def start(self) -> None:
+        if self.replicas and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "replicas": [
+                {
+                    "url": replica.url.render_as_string(hide_password=True),
+                    "healthy": self.healthy[i],
+                    "active": self.active[i],
+                }
+                for i, replica in enumerate(self.replicas)
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    [create_engine_from_settings(url) for url in settings.DATABASE_REPLICA_URLS],
+    strategy=settings.DB_REPLICA_STRATEGY,
+    health_interval=settings.DB_REPLICA_HEALTH_INTERVAL,
+)
+
+# Cookie, закрепляющая клиента за основной базой после его записи (read-your-writes)
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+
+@asynccontextmanager
+async def read_session(request: Optional[Request] = None):
+    """
+    Сессия для чтения на реплике. Клиент, недавно выполнявший запись,
+    читает из основной базы, чтобы видеть собственные изменения.
+    """
+    index = None
+    sticky_until = request.cookies.get(PRIMARY_STICKY_COOKIE) if request else None
+    try:
+        sticky = sticky_until is not None and float(sticky_until) > time.time()
+    except ValueError:
+        sticky = False
+    if not sticky:
+        index = replica_router.choose()
+
+    if index is None:
+        session = async_session()
+    else:
+        session = async_session(bind=replica_router.replicas[index])
+        replica_router.active[index] += 1
+    try:
+        yield session
+    finally:
+        await session.close()
+        if index is not None:
+            replica_router.active[index] -= 1
+
+
+async def get_read_db(request: Request):
+    """Получение сессии для чтения (реплика или основная база)."""
+    async with read_session(request) as session:
+        yield session
+
+
+async def get_write_db(response: Response):
+    """
+    Получение сессии основной базы для записи. Клиент закрепляется за основной
+    базой на DB_READ_YOUR_WRITES_WINDOW секунд.
+    """
+    if replica_router.replicas and settings.DB_READ_YOUR_WRITES_WINDOW > 0:
+        window = settings.DB_READ_YOUR_WRITES_WINDOW
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            f"{time.time() + window:.3f}",
+            max_age=int(window) + 1,
+            httponly=True,
+            samesite="lax",
+        )
     session = async_session()
     try:
         yield session
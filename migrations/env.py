@@ -2,6 +2,9 @@ from logging.config import fileConfig
 from sqlalchemy import pool, create_engine
 from alembic import context
 from src.Users.models import Base
+from src.Users.search import is_search_object
+from src.utils.jobs import Job  # noqa: F401  таблица jobs в метаданных
+from src.utils.versions import TableVersion  # noqa: F401  таблица table_versions в метаданных
 from config import settings
 
 config = context.config
@@ -16,6 +19,11 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Объекты полнотекстового поиска создаются миграцией вручную и не описаны в моделях."""
+    return not (reflected and is_search_object(name))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
@@ -24,6 +32,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -38,7 +47,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
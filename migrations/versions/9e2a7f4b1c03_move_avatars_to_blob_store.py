@@ -0,0 +1,83 @@
+"""Move avatars to blob store
+
+Revision ID: 9e2a7f4b1c03
+Revises: 7c41d0e8a2b5
+Create Date: 2026-10-17 11:41:52.913470
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.utils.blob_store import get_blob_store
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2a7f4b1c03"
+down_revision: Union[str, None] = "7c41d0e8a2b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+participants = sa.table(
+    "participants",
+    sa.column("id", sa.Integer),
+    sa.column("avatar", sa.LargeBinary),
+    sa.column("avatar_key", sa.String),
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "participants", sa.Column("avatar_key", sa.String(length=64), nullable=True)
+    )
+
+    # Переносим аватары в хранилище порциями, чтобы не загружать все блобы в память
+    bind = op.get_bind()
+    store = get_blob_store()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(participants.c.id, participants.c.avatar)
+            .where(participants.c.id > last_id)
+            .where(participants.c.avatar.isnot(None))
+            .order_by(participants.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        updates = [{"pid": row.id, "key": store.put(bytes(row.avatar))} for row in rows]
+        bind.execute(
+            participants.update()
+            .where(participants.c.id == sa.bindparam("pid"))
+            .values(avatar_key=sa.bindparam("key")),
+            updates,
+        )
+        last_id = rows[-1].id
+
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.drop_column("avatar")
+
+
+def downgrade() -> None:
+    op.add_column("participants", sa.Column("avatar", sa.LargeBinary(), nullable=True))
+
+    bind = op.get_bind()
+    store = get_blob_store()
+    rows = bind.execute(
+        sa.select(participants.c.id, participants.c.avatar_key).where(
+            participants.c.avatar_key.isnot(None)
+        )
+    ).fetchall()
+    for row in rows:
+        bind.execute(
+            participants.update()
+            .where(participants.c.id == row.id)
+            .values(avatar=store.get(row.avatar_key))
+        )
+
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.drop_column("avatar_key")
@@ -0,0 +1,75 @@
+"""Name search: FTS5 table on SQLite, pg_trgm index on PostgreSQL
+
+Revision ID: d2a6b9c4e7f1
+Revises: c8f1e2a9d4b6
+Create Date: 2026-10-17 14:20:08.391552
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2a6b9c4e7f1"
+down_revision: Union[str, None] = "c8f1e2a9d4b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS participants_fts USING fts5("
+    "first_name, last_name, content='participants', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS participants_fts_insert AFTER INSERT ON participants BEGIN "
+    "INSERT INTO participants_fts(rowid, first_name, last_name) "
+    "VALUES (new.id, new.first_name, new.last_name); END",
+    "CREATE TRIGGER IF NOT EXISTS participants_fts_delete AFTER DELETE ON participants BEGIN "
+    "INSERT INTO participants_fts(participants_fts, rowid, first_name, last_name) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name); END",
+    "CREATE TRIGGER IF NOT EXISTS participants_fts_update "
+    "AFTER UPDATE OF first_name, last_name ON participants BEGIN "
+    "INSERT INTO participants_fts(participants_fts, rowid, first_name, last_name) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name); "
+    "INSERT INTO participants_fts(rowid, first_name, last_name) "
+    "VALUES (new.id, new.first_name, new.last_name); END",
+    # Индексируем уже существующих участников
+    "INSERT INTO participants_fts(participants_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS participants_fts_update",
+    "DROP TRIGGER IF EXISTS participants_fts_delete",
+    "DROP TRIGGER IF EXISTS participants_fts_insert",
+    "DROP TABLE IF EXISTS participants_fts",
+]
+
+POSTGRES_UPGRADE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_participants_name_trgm ON participants "
+    "USING gin ((first_name || ' ' || last_name) gin_trgm_ops)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_participants_name_trgm",
+]
+
+
+def _statements(sqlite, postgresql):
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite
+    if dialect == "postgresql":
+        return postgresql
+    return []
+
+
+def upgrade() -> None:
+    for statement in _statements(SQLITE_UPGRADE, POSTGRES_UPGRADE):
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for statement in _statements(SQLITE_DOWNGRADE, POSTGRES_DOWNGRADE):
+        op.execute(statement)
@@ -0,0 +1,99 @@
+"""Mutual matches table and per-participant like counters
+
+Revision ID: e4b7c1d9f2a8
+Revises: d2a6b9c4e7f1
+Create Date: 2026-10-17 18:21:07.330415
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from src.Users.search import SQLITE_SEARCH_DDL
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b7c1d9f2a8"
+down_revision: Union[str, None] = "d2a6b9c4e7f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mutual_matches",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("partner_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["partner_id"],
+            ["participants.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["participants.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "partner_id", name="unique_mutual_match"),
+    )
+    op.create_index(
+        "ix_mutual_matches_user_id_created_at",
+        "mutual_matches",
+        ["user_id", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_matches_target_user_id_created_at",
+        "matches",
+        ["target_user_id", "created_at"],
+        unique=False,
+    )
+    op.add_column(
+        "participants",
+        sa.Column(
+            "likes_received_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+    op.add_column(
+        "participants",
+        sa.Column(
+            "mutual_matches_count", sa.Integer(), server_default="0", nullable=False
+        ),
+    )
+
+    # Заполнение по уже существующим лайкам: симпатия возникла при более позднем из двух лайков
+    op.execute(
+        "INSERT INTO mutual_matches (user_id, partner_id, created_at) "
+        "SELECT a.user_id, a.target_user_id, "
+        "CASE WHEN a.created_at > b.created_at THEN a.created_at ELSE b.created_at END "
+        "FROM matches a JOIN matches b "
+        "ON b.user_id = a.target_user_id AND b.target_user_id = a.user_id"
+    )
+    op.execute(
+        "UPDATE participants SET "
+        "likes_received_count = (SELECT COUNT(*) FROM matches "
+        "WHERE matches.target_user_id = participants.id), "
+        "mutual_matches_count = (SELECT COUNT(*) FROM mutual_matches "
+        "WHERE mutual_matches.user_id = participants.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("participants") as batch_op:
+        batch_op.drop_column("mutual_matches_count")
+        batch_op.drop_column("likes_received_count")
+    _restore_search_triggers()
+    op.drop_index("ix_matches_target_user_id_created_at", table_name="matches")
+    op.drop_index("ix_mutual_matches_user_id_created_at", table_name="mutual_matches")
+    op.drop_table("mutual_matches")
+
+
+def _restore_search_triggers() -> None:
+    # На SQLite batch_alter_table пересоздает таблицу participants, и ее
+    # триггеры полнотекстового поиска удаляются; создаем их заново
+    if op.get_bind().dialect.name == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            op.execute(statement)
@@ -1,18 +1,112 @@
-from sqlalchemy import select, func, and_
+from sqlalchemy import (
+    select,
+    update,
+    func,
+    and_,
+    or_,
+    tuple_,
+    literal,
+    literal_column,
+    table,
+    column,
+    Row,
+    Select,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from .models import Participant, Match
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import Participant, Match, MutualMatch
 from .schemas import ParticipantCreate
-from typing import Optional, List
+from .search import SEARCH_TABLE, fts5_query, full_name, search_terms
+from typing import AsyncIterator, Optional, List, NamedTuple, Sequence, Set, Tuple
+from enum import Enum
 from datetime import datetime, timedelta
 from src.utils.logging import AppLogger
-from src.utils.distance import calculate_distance
-from functools import lru_cache
+from src.utils.cache import AsyncTTLCache
+from src.utils.jobs import job_queue
+from src.utils.versions import PARTICIPANTS_VERSION, change_versions
+from src.utils.distance import (
+    filter_within_radius,
+    parse_coordinate,
+    geo_cell,
+    bounding_box,
+    cells_for_box,
+)
+from config import settings
 
 
 logger = AppLogger().get_logger()
 
-# Устанавливаем время жизни кэша (7 дней в секундах)
-CACHE_TTL = 7 * 24 * 60 * 60
+# Кэш результатов поиска по расстоянию, сбрасывается при регистрации участников;
+# ключ содержит версию таблицы, поэтому изменения из других процессов тоже учитываются
+nearby_cache = AsyncTTLCache(
+    "nearby_participants",
+    maxsize=settings.NEARBY_CACHE_MAXSIZE,
+    ttl=settings.NEARBY_CACHE_TTL,
+)
+
+
+# Колонки, из которых строится ParticipantResponse: списки и выгрузка читают
+# только их, без ORM-объектов и карты идентичности сессии
+RESPONSE_COLUMNS = (
+    Participant.id,
+    Participant.gender,
+    Participant.first_name,
+    Participant.last_name,
+    Participant.email,
+    Participant.is_active,
+    Participant.created_at,
+    Participant.latitude,
+    Participant.longitude,
+    Participant.city,
+    Participant.avatar_status,
+    Participant.location_status,
+)
+
+
+def _filter_participants(
+    query: Select,
+    gender: Optional[str] = None,
+    first_name: Optional[str] = None,
+    last_name: Optional[str] = None,
+) -> Select:
+    """Фильтры списка участников по полу, имени и фамилии."""
+    if gender:
+        query = query.where(Participant.gender == gender)
+    if first_name:
+        query = query.where(Participant.first_name.ilike(f"%{first_name}%"))
+    if last_name:
+        query = query.where(Participant.last_name.ilike(f"%{last_name}%"))
+    return query
+
+
+def _box_condition(base_lat: float, base_lon: float, max_distance: float):
+    """Условие попадания в bounding box и ячейки сетки, содержащие круг поиска."""
+    min_lat, max_lat, lon_ranges = bounding_box(base_lat, base_lon, max_distance)
+    conditions = [
+        Participant.lat.between(min_lat, max_lat),
+        or_(*(Participant.lon.between(lo, hi) for lo, hi in lon_ranges)),
+    ]
+    cells = cells_for_box(min_lat, max_lat, lon_ranges)
+    if cells is not None:
+        conditions.append(Participant.geo_cell.in_(cells))
+    return and_(*conditions)
+
+
+def _within_box(
+    query: Select, base_lat: float, base_lon: float, max_distance: float
+) -> Select:
+    """Префильтр по bounding box и ячейкам сетки, содержащим круг поиска."""
+    return query.where(_box_condition(base_lat, base_lon, max_distance))
+
+
+def _within_radius(items: list, base_lat: float, base_lon: float, max_distance: float):
+    """Точная проверка расстояния одним векторизованным проходом по полям lat/lon."""
+    import numpy as np
+
+    lats = np.fromiter((p.lat for p in items), np.float64, len(items))
+    lons = np.fromiter((p.lon for p in items), np.float64, len(items))
+    return filter_within_radius(items, lats, lons, base_lat, base_lon, max_distance)
 
 
 class ParticipantCRUD:
@@ -34,19 +128,42 @@ class ParticipantCRUD:
         )
         return result.scalar_one_or_none()
 
+    @staticmethod
+    async def get_avatar_keys(
+        db: AsyncSession, participant_id: int
+    ) -> Optional[Tuple[Optional[str], Optional[dict]]]:
+        """Получение ключей аватара и его производных без загрузки остальных полей."""
+        result = await db.execute(
+            select(Participant.avatar_key, Participant.avatar_variants).where(
+                Participant.id == participant_id
+            )
+        )
+        row = result.one_or_none()
+        return tuple(row) if row is not None else None
+
     @staticmethod
     async def create_participant(
         db: AsyncSession,
         participant_data: ParticipantCreate,
         hashed_password: str,
-        avatar: bytes,
+        avatar_key: Optional[str],
+        avatar_variants: Optional[dict] = None,
         latitude: Optional[str] = None,
         longitude: Optional[str] = None,
         city: Optional[str] = None,  # Добавлено поле city
+        avatar_status: str = "ready",
+        location_status: str = "ready",
+        jobs: Sequence[Tuple[str, dict]] = (),
     ) -> Optional[Participant | bool]:
-        """Создание нового участника с хэшированным паролем, аватаркой и координатами."""
+        """
+        Создание нового участника с хэшированным паролем, ключом аватара и координатами.
+        jobs — фоновые задачи (тип, payload), добавляемые в той же транзакции;
+        в payload подставляется participant_id.
+        """
+        lat, lon = parse_coordinate(latitude), parse_coordinate(longitude)
         new_participant = Participant(
-            avatar=avatar,
+            avatar_key=avatar_key,
+            avatar_variants=avatar_variants,
             gender=participant_data.gender,
             first_name=participant_data.first_name,
             last_name=participant_data.last_name,
@@ -55,39 +172,270 @@ class ParticipantCRUD:
             latitude=latitude,
             longitude=longitude,
             city=city,  # Сохранение города в базе данных
+            lat=lat,
+            lon=lon,
+            geo_cell=geo_cell(lat, lon),
+            avatar_status=avatar_status,
+            location_status=location_status,
         )
 
         try:
             db.add(new_participant)
+            if jobs:
+                await db.flush()
+                for kind, payload in jobs:
+                    job_queue.enqueue(
+                        db, kind, {**payload, "participant_id": new_participant.id}
+                    )
+            await db.flush()
+            await change_versions.bump(db, PARTICIPANTS_VERSION)
             await db.commit()
             await db.refresh(new_participant)
+            nearby_cache.invalidate()
+            job_queue.notify()
             return new_participant
         except Exception as e:
             await db.rollback()
             logger.error("Ошибка при создании участника: %s", e)
             return False
 
+    @staticmethod
+    async def get_processing_status(
+        db: AsyncSession, participant_id: int
+    ) -> Optional[Tuple[str, str]]:
+        """(avatar_status, location_status) участника или None, если его нет."""
+        result = await db.execute(
+            select(Participant.avatar_status, Participant.location_status).where(
+                Participant.id == participant_id
+            )
+        )
+        row = result.one_or_none()
+        return tuple(row) if row is not None else None
+
+    @staticmethod
+    async def update_avatar(
+        db: AsyncSession,
+        participant_id: int,
+        avatar_key: str,
+        avatar_variants: Optional[dict],
+    ) -> None:
+        """Сохраняет обработанный аватар и отмечает его готовым."""
+        await db.execute(
+            update(Participant)
+            .where(Participant.id == participant_id)
+            .values(
+                avatar_key=avatar_key,
+                avatar_variants=avatar_variants,
+                avatar_status="ready",
+            )
+        )
+        await change_versions.bump(db, PARTICIPANTS_VERSION)
+        await db.commit()
+        nearby_cache.invalidate()
+
+    @staticmethod
+    async def update_location(
+        db: AsyncSession,
+        participant_id: int,
+        latitude: Optional[str] = None,
+        longitude: Optional[str] = None,
+        city: Optional[str] = None,
+    ) -> None:
+        """Сохраняет координаты (если город найден) и отмечает их готовыми."""
+        values = {"location_status": "ready"}
+        if latitude is not None and longitude is not None:
+            lat, lon = parse_coordinate(latitude), parse_coordinate(longitude)
+            values.update(
+                latitude=latitude,
+                longitude=longitude,
+                city=city,
+                lat=lat,
+                lon=lon,
+                geo_cell=geo_cell(lat, lon),
+            )
+        await db.execute(
+            update(Participant).where(Participant.id == participant_id).values(**values)
+        )
+        await change_versions.bump(db, PARTICIPANTS_VERSION)
+        await db.commit()
+        nearby_cache.invalidate()
+
+    @staticmethod
+    async def set_processing_status(
+        db: AsyncSession, participant_id: int, **statuses: str
+    ) -> None:
+        """Обновляет avatar_status и/или location_status."""
+        await db.execute(
+            update(Participant)
+            .where(Participant.id == participant_id)
+            .values(**statuses)
+        )
+        await change_versions.bump(db, PARTICIPANTS_VERSION)
+        await db.commit()
+        nearby_cache.invalidate()
+
+    @staticmethod
+    async def get_existing_emails(db: AsyncSession, emails: List[str]) -> Set[str]:
+        """Email из списка, которые уже зарегистрированы."""
+        if not emails:
+            return set()
+        result = await db.execute(
+            select(Participant.email).where(Participant.email.in_(emails))
+        )
+        return set(result.scalars().all())
+
+    @staticmethod
+    async def bulk_insert_participants(db: AsyncSession, rows: List[dict]) -> int:
+        """
+        Пакетная вставка участников одним многострочным INSERT. Строки с уже
+        существующим email пропускаются; возвращает число вставленных участников.
+        """
+        if not rows:
+            return 0
+        for row in rows:
+            row["lat"] = parse_coordinate(row.get("latitude"))
+            row["lon"] = parse_coordinate(row.get("longitude"))
+            row["geo_cell"] = geo_cell(row["lat"], row["lon"])
+        insert = (
+            _dialect_insert(db)(Participant)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(Participant.id)
+        )
+        try:
+            result = await db.execute(insert, rows)
+            inserted = len(result.scalars().all())
+            if inserted:
+                await change_versions.bump(db, PARTICIPANTS_VERSION)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        nearby_cache.invalidate()
+        return inserted
+
     @staticmethod
     async def get_participants(
         db: AsyncSession,
         gender: Optional[str] = None,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
-    ) -> List[Participant]:
-        """Получение списка участников с фильтрацией по полу, имени и фамилии."""
-        query = select(Participant)
-        if gender:
-            query = query.where(Participant.gender == gender)
-        if first_name:
-            query = query.where(Participant.first_name.ilike(f"%{first_name}%"))
-        if last_name:
-            query = query.where(Participant.last_name.ilike(f"%{last_name}%"))
+        newest_first: bool = False,
+        limit: Optional[int] = None,
+        cursor: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Row]:
+        """
+        Получение списка участников с фильтрацией по полу, имени и фамилии.
+        Сортировка по (created_at, id) выполняется в БД; cursor — позиция,
+        после которой начинается страница (keyset-пагинация).
+        Возвращает строки с колонками ответа API (RESPONSE_COLUMNS).
+        """
+        query = _filter_participants(
+            select(*RESPONSE_COLUMNS), gender, first_name, last_name
+        )
+
+        position = tuple_(Participant.created_at, Participant.id)
+        if cursor is not None:
+            # Тип колонки указываем явно, чтобы дата привязывалась в формате хранения
+            created_at, participant_id = cursor
+            after = tuple_(
+                literal(created_at, Participant.created_at.type), participant_id
+            )
+            if newest_first:
+                query = query.where(position < after)
+            else:
+                query = query.where(position > after)
+        if newest_first:
+            query = query.order_by(Participant.created_at.desc(), Participant.id.desc())
+        else:
+            query = query.order_by(Participant.created_at, Participant.id)
+        if limit is not None:
+            query = query.limit(limit)
 
         result = await db.execute(query)
-        return result.scalars().all()
+        return result.all()
+
+    @staticmethod
+    async def search_participants(
+        db: AsyncSession,
+        query: str,
+        limit: int,
+        gender: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+    ) -> List[Row]:
+        """
+        Поиск участников по имени и фамилии с ранжированием по релевантности.
+        Использует FTS5 в SQLite и триграммный индекс в PostgreSQL; фильтры
+        по полу, имени и фамилии применяются как в списке участников.
+        Возвращает строки с колонками ответа API (RESPONSE_COLUMNS).
+        """
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            match = fts5_query(query)
+            if match is None:
+                return []
+            fts = table(SEARCH_TABLE, column("rowid"))
+            statement = (
+                select(*RESPONSE_COLUMNS)
+                .join(fts, fts.c.rowid == Participant.id)
+                .where(literal_column(SEARCH_TABLE).op("MATCH")(match))
+                .order_by(func.bm25(literal_column(SEARCH_TABLE)), Participant.id)
+            )
+        elif dialect == "postgresql":
+            text = " ".join(search_terms(query))
+            if not text:
+                return []
+            name = full_name(Participant.first_name, Participant.last_name)
+            # В словах запроса из спецсимволов LIKE может встретиться только "_"
+            pattern = "%" + text.replace("_", "/_") + "%"
+            statement = (
+                select(*RESPONSE_COLUMNS)
+                .where(or_(name.ilike(pattern, escape="/"), name.op("%")(text)))
+                .order_by(func.similarity(name, text).desc(), Participant.id)
+            )
+        else:
+            terms = search_terms(query)
+            if not terms:
+                return []
+            statement = select(*RESPONSE_COLUMNS).order_by(Participant.id)
+            for term in terms:
+                statement = statement.where(
+                    or_(
+                        Participant.first_name.ilike(f"{term}%"),
+                        Participant.last_name.ilike(f"{term}%"),
+                    )
+                )
+
+        statement = _filter_participants(statement, gender, first_name, last_name)
+        result = await db.execute(statement.limit(limit))
+        return result.all()
+
+    @staticmethod
+    async def stream_participants(
+        db: AsyncSession,
+        gender: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+        newest_first: bool = False,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Потоковое чтение участников пачками по batch_size строк через серверный
+        курсор. Выбираются только колонки ответа API, ORM-объекты не создаются.
+        """
+        query = _filter_participants(
+            select(*RESPONSE_COLUMNS), gender, first_name, last_name
+        )
+        if newest_first:
+            query = query.order_by(Participant.created_at.desc(), Participant.id.desc())
+        else:
+            query = query.order_by(Participant.created_at, Participant.id)
+
+        result = await db.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
 
     @staticmethod
-    @lru_cache(maxsize=1024)
     async def get_nearby_participants(
         db: AsyncSession,
         base_lat: float,
@@ -96,73 +444,325 @@ class ParticipantCRUD:
         gender: Optional[str] = None,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
-    ) -> List[Participant]:
+    ) -> List[Row]:
         """Получает список участников, находящихся в пределах max_distance километров с кэшированием."""
-        query = select(Participant)
+        # Округляем координаты, чтобы близкие запросы попадали в одну запись кэша
+        precision = settings.NEARBY_CACHE_COORD_PRECISION
+        base_lat, base_lon = round(base_lat, precision), round(base_lon, precision)
+        version = await change_versions.get(db, PARTICIPANTS_VERSION)
+        key = (version, base_lat, base_lon, max_distance, gender, first_name, last_name)
+
+        participants = await nearby_cache.get_or_load(
+            key,
+            lambda: ParticipantCRUD._query_nearby_participants(
+                db, base_lat, base_lon, max_distance, gender, first_name, last_name
+            ),
+        )
+        # Копия списка, чтобы вызывающий код не изменял закэшированное значение
+        return list(participants)
 
-        if gender:
-            query = query.where(Participant.gender == gender)
-        if first_name:
-            query = query.where(Participant.first_name.ilike(f"%{first_name}%"))
-        if last_name:
-            query = query.where(Participant.last_name.ilike(f"%{last_name}%"))
+    @staticmethod
+    async def _query_nearby_participants(
+        db: AsyncSession,
+        base_lat: float,
+        base_lon: float,
+        max_distance: float,
+        gender: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+    ) -> List[Row]:
+        """
+        Запрос участников в пределах max_distance километров без кэша.
+        Возвращает строки с колонками ответа API и числовыми координатами.
+        """
+        # Префильтр в БД: ячейки сетки и bounding box, точная проверка — ниже
+        query = _within_box(
+            select(*RESPONSE_COLUMNS, Participant.lat, Participant.lon),
+            base_lat,
+            base_lon,
+            max_distance,
+        )
+        query = _filter_participants(query, gender, first_name, last_name)
 
         result = await db.execute(query)
-        participants = result.scalars().all()
+        return _within_radius(result.all(), base_lat, base_lon, max_distance)
 
-        # Фильтруем участников по расстоянию
-        nearby_participants = [
-            p
-            for p in participants
-            if p.latitude
-            and p.longitude
-            and calculate_distance(
-                base_lat, base_lon, float(p.latitude), float(p.longitude)
+    @staticmethod
+    async def get_discover_candidates(
+        db: AsyncSession,
+        user_id: int,
+        after_id: int,
+        scan_size: int,
+        base_lat: Optional[float] = None,
+        base_lon: Optional[float] = None,
+        max_distance: Optional[float] = None,
+        gender: Optional[str] = None,
+    ) -> Tuple[List[int], Optional[int]]:
+        """
+        Сканирует следующих scan_size участников с id > after_id, исключая самого
+        участника и тех, кому он уже поставил лайк. Возвращает id подходящих
+        кандидатов и id последнего просмотренного участника (None — больше никого нет).
+        При поиске по расстоянию сканирование останавливается перед участником,
+        чьи координаты еще определяются: его позиция проверяется после
+        геокодирования. Если такой участник первый, возвращается after_id.
+        """
+        liked = select(Match.id).where(
+            Match.user_id == user_id, Match.target_user_id == Participant.id
+        )
+        query = (
+            select(
+                Participant.id,
+                Participant.lat,
+                Participant.lon,
+                Participant.location_status,
             )
-            <= max_distance
-        ]
+            .where(Participant.id > after_id)
+            .where(Participant.id != user_id)
+            .where(~liked.exists())
+        )
+        if max_distance is not None:
+            query = query.where(
+                or_(
+                    _box_condition(base_lat, base_lon, max_distance),
+                    Participant.location_status == "pending",
+                )
+            )
+        query = _filter_participants(query, gender)
+
+        result = await db.execute(query.order_by(Participant.id).limit(scan_size))
+        rows = result.all()
+        if not rows:
+            return [], None
+        last_id = rows[-1].id
+        if max_distance is not None:
+            for index, row in enumerate(rows):
+                if row.location_status == "pending":
+                    rows = rows[:index]
+                    last_id = rows[-1].id if rows else after_id
+                    break
+            rows = _within_radius(rows, base_lat, base_lon, max_distance)
+        return [row.id for row in rows], last_id
+
+    @staticmethod
+    async def get_participants_by_ids(
+        db: AsyncSession, participant_ids: List[int]
+    ) -> List[Participant]:
+        """Участники по списку id в том же порядке; отсутствующие пропускаются."""
+        if not participant_ids:
+            return []
+        result = await db.execute(
+            select(Participant).where(Participant.id.in_(participant_ids))
+        )
+        by_id = {p.id: p for p in result.scalars().all()}
+        return [by_id[i] for i in participant_ids if i in by_id]
+
+
+class LikeStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    OVER_QUOTA = "over_quota"
+    MUTUAL = "mutual"
+    NOT_FOUND = "not_found"
+
+
+class LikeResult(NamedTuple):
+    status: LikeStatus
+    # Заполняются только при взаимной симпатии
+    target_first_name: Optional[str] = None
+    target_email: Optional[str] = None
+
 
-        return nearby_participants
+def _dialect_insert(db: AsyncSession):
+    """insert() с поддержкой ON CONFLICT для диалекта текущей сессии."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
 
 
 class MatchCRUD:
     @staticmethod
-    async def create_match(
-        db: AsyncSession, user_id: int, target_user_id: int
-    ) -> Optional[Match]:
-        """Создание лайка между участниками. Проверяет, существует ли уже лайк от user_id к target_user_id."""
-        existing_match = await db.execute(
-            select(Match).where(
-                and_(Match.user_id == user_id, Match.target_user_id == target_user_id)
+    async def like(
+        db: AsyncSession,
+        user_id: int,
+        target_user_id: int,
+        max_likes_per_day: Optional[int] = None,
+    ) -> LikeResult:
+        """
+        Ставит лайк в одной транзакции: проверка дневного лимита (если он задан)
+        и вставка выполняются одним INSERT ... SELECT ... ON CONFLICT DO NOTHING,
+        затем одним запросом ищется обратный лайк вместе с именем и email его автора.
+        В той же транзакции записывается взаимная симпатия и обновляются счетчики.
+        Несуществующий участник (нарушение внешнего ключа) дает NOT_FOUND.
+        """
+        now = datetime.utcnow()
+        values = select(
+            literal(user_id),
+            literal(target_user_id),
+            literal(now, Match.created_at.type),
+        )
+        if max_likes_per_day is not None:
+            likes_today = (
+                select(func.count(Match.id))
+                .where(Match.user_id == user_id)
+                .where(Match.created_at >= now - timedelta(days=1))
+                .scalar_subquery()
             )
+            values = values.where(likes_today < max_likes_per_day)
+        insert = (
+            _dialect_insert(db)(Match)
+            .from_select(["user_id", "target_user_id", "created_at"], values)
+            .on_conflict_do_nothing(index_elements=["user_id", "target_user_id"])
+            .returning(Match.id)
         )
-        if existing_match.scalar() is not None:
-            raise Exception("Лайк уже существует")
 
-        match = Match(user_id=user_id, target_user_id=target_user_id)
-        db.add(match)
-        await db.commit()
-        return match
+        try:
+            inserted = (await db.execute(insert)).scalar_one_or_none()
+            if inserted is None:
+                # Вставка не произошла: либо исчерпан лимит, либо лайк уже есть.
+                # Лимит проверяется первым, как в бэкенде лимита в памяти
+                over_quota = max_likes_per_day is not None and (
+                    await db.scalar(select(likes_today)) >= max_likes_per_day
+                )
+                await db.rollback()
+                if over_quota:
+                    return LikeResult(LikeStatus.OVER_QUOTA)
+                return LikeResult(LikeStatus.DUPLICATE)
+
+            reverse = await db.execute(
+                select(Participant.first_name, Participant.email)
+                .join(Match, Match.user_id == Participant.id)
+                .where(Match.user_id == target_user_id)
+                .where(Match.target_user_id == user_id)
+            )
+            mutual = reverse.one_or_none()
+
+            await db.execute(
+                update(Participant)
+                .where(Participant.id == target_user_id)
+                .values(likes_received_count=Participant.likes_received_count + 1)
+            )
+            if mutual is not None:
+                await MatchCRUD._record_mutual_match(db, user_id, target_user_id, now)
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            return LikeResult(LikeStatus.NOT_FOUND)
+        except Exception:
+            await db.rollback()
+            raise
+
+        if mutual is None:
+            return LikeResult(LikeStatus.CREATED)
+        return LikeResult(LikeStatus.MUTUAL, mutual.first_name, mutual.email)
+
+    @staticmethod
+    async def _record_mutual_match(
+        db: AsyncSession, user_id: int, partner_id: int, created_at: datetime
+    ) -> None:
+        """Записывает взаимную симпатию для обоих участников и увеличивает их счетчики."""
+        inserted = await db.execute(
+            _dialect_insert(db)(MutualMatch)
+            .values(
+                [
+                    {
+                        "user_id": user_id,
+                        "partner_id": partner_id,
+                        "created_at": created_at,
+                    },
+                    {
+                        "user_id": partner_id,
+                        "partner_id": user_id,
+                        "created_at": created_at,
+                    },
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "partner_id"])
+            .returning(MutualMatch.user_id)
+        )
+        counted = inserted.scalars().all()
+        if counted:
+            await db.execute(
+                update(Participant)
+                .where(Participant.id.in_(counted))
+                .values(mutual_matches_count=Participant.mutual_matches_count + 1)
+            )
 
     @staticmethod
-    async def check_mutual_like(
-        db: AsyncSession, user_id: int, target_user_id: int
-    ) -> bool:
-        """Проверяет, есть ли взаимный лайк между пользователями."""
+    async def get_mutual_matches(
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        cursor: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Tuple[Participant, datetime, int]]:
+        """
+        Взаимные симпатии участника, сначала новые: (партнер, время симпатии, id записи).
+        cursor — (created_at, id) последней записи предыдущей страницы.
+        """
+        query = (
+            select(Participant, MutualMatch.created_at, MutualMatch.id)
+            .join(MutualMatch, MutualMatch.partner_id == Participant.id)
+            .where(MutualMatch.user_id == user_id)
+        )
+        if cursor is not None:
+            query = query.where(
+                tuple_(MutualMatch.created_at, MutualMatch.id)
+                < tuple_(literal(cursor[0], MutualMatch.created_at.type), cursor[1])
+            )
         result = await db.execute(
-            select(Match)
-            .where(Match.user_id == target_user_id)
+            query.order_by(MutualMatch.created_at.desc(), MutualMatch.id.desc()).limit(
+                limit
+            )
+        )
+        return [tuple(row) for row in result.all()]
+
+    @staticmethod
+    async def get_incoming_likes(
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        cursor: Optional[Tuple[datetime, int]] = None,
+    ) -> List[Tuple[Participant, datetime, int]]:
+        """
+        Участники, поставившие лайк user_id, сначала новые: (автор, время лайка, id лайка).
+        Использует индекс (target_user_id, created_at).
+        """
+        query = (
+            select(Participant, Match.created_at, Match.id)
+            .join(Match, Match.user_id == Participant.id)
             .where(Match.target_user_id == user_id)
         )
-        return result.scalar_one_or_none() is not None
+        if cursor is not None:
+            query = query.where(
+                tuple_(Match.created_at, Match.id)
+                < tuple_(literal(cursor[0], Match.created_at.type), cursor[1])
+            )
+        result = await db.execute(
+            query.order_by(Match.created_at.desc(), Match.id.desc()).limit(limit)
+        )
+        return [tuple(row) for row in result.all()]
+
+    @staticmethod
+    async def get_liked_ids(
+        db: AsyncSession, user_id: int, target_user_ids: List[int]
+    ) -> Set[int]:
+        """Кому из target_user_ids участник уже поставил лайк."""
+        if not target_user_ids:
+            return set()
+        result = await db.execute(
+            select(Match.target_user_id)
+            .where(Match.user_id == user_id)
+            .where(Match.target_user_id.in_(target_user_ids))
+        )
+        return set(result.scalars().all())
 
     @staticmethod
-    async def get_daily_likes_count(db: AsyncSession, user_id: int) -> int:
-        """Возвращает количество лайков, поставленных участником за последние 24 часа."""
-        day_ago = datetime.utcnow() - timedelta(days=1)
+    async def get_like_times_since(
+        db: AsyncSession, user_id: int, since: datetime
+    ) -> List[datetime]:
+        """Время лайков участника начиная с since (для заполнения счетчиков лимита)."""
         result = await db.execute(
-            select(func.count(Match.id))
+            select(Match.created_at)
             .where(Match.user_id == user_id)
-            .where(Match.created_at >= day_ago)
+            .where(Match.created_at >= since)
         )
-        return result.scalar()
+        return result.scalars().all()
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Set
+
+from config import settings
+from db import read_session
+from src.utils.logging import AppLogger
+from .crud import ParticipantCRUD, MatchCRUD
+
+logger = AppLogger().get_logger()
+
+
+class FeedParams(NamedTuple):
+    """Параметры ленты; при их изменении лента строится заново."""
+
+    base_lat: Optional[float]
+    base_lon: Optional[float]
+    max_distance: Optional[float]
+    gender: Optional[str]
+
+
+class CandidateFeed:
+    """
+    Лента кандидатов одного участника: очередь id и позиция сканирования таблицы.
+    Участники сканируются по возрастанию id, поэтому новые регистрации
+    попадают в ленту при следующем пополнении без перестроения.
+    """
+
+    def __init__(self, user_id: int, params: FeedParams):
+        self.user_id = user_id
+        self.params = params
+        self.queue: Deque[int] = deque()
+        self.queued: Set[int] = set()
+        self.last_scanned_id = 0
+        self.exhausted = False
+        self.touched_at = time.monotonic()
+        self.refill_task: Optional[asyncio.Task] = None
+        # Пополнения одной ленты выполняются по очереди
+        self.lock = asyncio.Lock()
+
+    def take(self, limit: int) -> List[int]:
+        page = []
+        while self.queue and len(page) < limit:
+            candidate_id = self.queue.popleft()
+            self.queued.discard(candidate_id)
+            page.append(candidate_id)
+        return page
+
+    def discard(self, candidate_id: int) -> None:
+        if candidate_id in self.queued:
+            self.queued.discard(candidate_id)
+            self.queue.remove(candidate_id)
+
+
+class DiscoverEngine:
+    """
+    Ленты кандидатов для /discover: рядом с участником, подходящие под фильтры
+    и без тех, кому он уже поставил лайк. Очередь пополняется в фоне, когда
+    в ней остается меньше refill_threshold кандидатов. Ленты хранятся в памяти
+    процесса с вытеснением неактивных; лайки, поставленные через другие воркеры,
+    отсеиваются проверкой страницы перед выдачей.
+    """
+
+    def __init__(
+        self,
+        scan_size: int = 200,
+        queue_size: int = 100,
+        max_feeds: int = 10_000,
+        ttl: float = 30 * 60,
+    ):
+        self.scan_size = scan_size
+        self.queue_size = queue_size
+        self.refill_threshold = queue_size // 2
+        self.max_feeds = max_feeds
+        self.ttl = ttl
+        self._feeds: "OrderedDict[int, CandidateFeed]" = OrderedDict()
+        self.scans = 0
+        self.evictions = 0
+
+    def _get_feed(self, user_id: int, params: FeedParams, reset: bool) -> CandidateFeed:
+        feed = self._feeds.get(user_id)
+        if feed is None or reset or feed.params != params:
+            if feed is not None and feed.refill_task is not None:
+                feed.refill_task.cancel()
+            feed = self._feeds[user_id] = CandidateFeed(user_id, params)
+        feed.touched_at = time.monotonic()
+        self._feeds.move_to_end(user_id)
+        self._evict()
+        return feed
+
+    def _evict(self) -> None:
+        idle_since = time.monotonic() - self.ttl
+        while self._feeds:
+            user_id, feed = next(iter(self._feeds.items()))
+            if len(self._feeds) <= self.max_feeds and feed.touched_at > idle_since:
+                break
+            if feed.refill_task is not None:
+                feed.refill_task.cancel()
+            del self._feeds[user_id]
+            self.evictions += 1
+
+    async def _refill(self, feed: CandidateFeed, db=None) -> None:
+        """Сканирует таблицу, пока очередь не заполнится или участники не закончатся."""
+        async with feed.lock:
+            if db is None:
+                async with read_session() as session:
+                    await self._scan(feed, session)
+            else:
+                await self._scan(feed, db)
+
+    async def _scan(self, feed: CandidateFeed, db) -> None:
+        params = feed.params
+        while len(feed.queue) < self.queue_size and not feed.exhausted:
+            self.scans += 1
+            candidate_ids, last_id = await ParticipantCRUD.get_discover_candidates(
+                db,
+                feed.user_id,
+                feed.last_scanned_id,
+                self.scan_size,
+                params.base_lat,
+                params.base_lon,
+                params.max_distance,
+                params.gender,
+            )
+            if last_id is None:
+                feed.exhausted = True
+                break
+            progressed = last_id != feed.last_scanned_id
+            feed.last_scanned_id = last_id
+            for candidate_id in candidate_ids:
+                if candidate_id not in feed.queued:
+                    feed.queue.append(candidate_id)
+                    feed.queued.add(candidate_id)
+            if not progressed:
+                # Следующий участник ждет геокодирования; сканирование
+                # продолжится при следующем пополнении
+                break
+
+    def _schedule_refill(self, feed: CandidateFeed) -> None:
+        if feed.exhausted or len(feed.queue) >= self.refill_threshold:
+            return
+        if feed.refill_task is not None and not feed.refill_task.done():
+            return
+        feed.refill_task = asyncio.create_task(self._refill(feed))
+        feed.refill_task.add_done_callback(_log_refill_error)
+
+    async def next_page(
+        self, db, user_id: int, params: FeedParams, limit: int, reset: bool = False
+    ) -> List[int]:
+        """Следующие limit кандидатов; выданные кандидаты из ленты удаляются."""
+        feed = self._get_feed(user_id, params, reset)
+        page: List[int] = []
+        while len(page) < limit:
+            if len(feed.queue) < limit - len(page) and not feed.exhausted:
+                # Очереди не хватает на страницу: пополняем синхронно в сессии запроса
+                await self._refill(feed, db)
+            candidates = feed.take(limit - len(page))
+            if not candidates:
+                break
+            liked = await MatchCRUD.get_liked_ids(db, user_id, candidates)
+            page.extend(c for c in candidates if c not in liked)
+        self._schedule_refill(feed)
+        return page
+
+    def is_exhausted(self, user_id: int) -> bool:
+        feed = self._feeds.get(user_id)
+        return feed is not None and feed.exhausted and not feed.queue
+
+    def on_participants_created(self) -> None:
+        """Новые участники: исчерпанные ленты снова сканируют таблицу с прежней позиции."""
+        for feed in self._feeds.values():
+            feed.exhausted = False
+
+    def on_location_resolved(self) -> None:
+        """Координаты участника определены: ленты, ожидавшие его, продолжают сканирование."""
+        self.on_participants_created()
+
+    def on_like(self, user_id: int, target_user_id: int) -> None:
+        """Лайк: участник больше не показывается в ленте того, кто его поставил."""
+        feed = self._feeds.get(user_id)
+        if feed is not None:
+            feed.discard(target_user_id)
+
+    async def close(self) -> None:
+        tasks = [f.refill_task for f in self._feeds.values() if f.refill_task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._feeds.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "feeds": len(self._feeds),
+            "queued": sum(len(feed.queue) for feed in self._feeds.values()),
+            "scans": self.scans,
+            "evictions": self.evictions,
+        }
+
+
+def _log_refill_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Ошибка пополнения ленты кандидатов: %s", task.exception())
+
+
+discover_engine = DiscoverEngine(
+    scan_size=settings.DISCOVER_SCAN_SIZE,
+    queue_size=settings.DISCOVER_QUEUE_SIZE,
+    max_feeds=settings.DISCOVER_MAX_FEEDS,
+    ttl=settings.DISCOVER_FEED_TTL,
+)
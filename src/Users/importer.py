@@ -0,0 +1,424 @@
+"""
+Массовый импорт участников из NDJSON/CSV-файла с каталогом аватаров.
+
+Запуск из командной строки:
+
+    python -m src.Users.importer participants.ndjson --avatars ./avatars
+
+Файл читается потоком и обрабатывается пакетами: пароли хэшируются и аватары
+обрабатываются в пулах воркеров, города геокодируются один раз на пакет,
+участники вставляются одним многострочным INSERT. После каждого пакета
+позиция сохраняется в файл контрольной точки, и повторный запуск продолжает
+импорт с нее.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from db import async_session
+from src.Users.crud import ParticipantCRUD
+from src.Users.discover import discover_engine
+from src.Users.manager import user_hash_manager
+from src.Users.schemas import ParticipantCreate
+from src.utils.blob_store import get_blob_store
+from src.utils.geolocation import GeoResult, geocoding_service, normalize_city
+from src.utils.image_processing import image_worker_pool, process_avatar
+from src.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+# Этапы импорта в порядке выполнения
+STAGES = ("parse", "hash", "avatar", "geocode", "insert")
+# Сколько ошибок по строкам сохраняется в отчете
+MAX_REPORTED_ERRORS = 100
+# Поля записи вне схемы регистрации; должны быть строками, если заданы
+OPTIONAL_TEXT_FIELDS = ("city", "avatar")
+
+
+class ImportRowError(Exception):
+    """Ошибка в отдельной строке файла импорта."""
+
+
+def _check_optional_fields(record: dict) -> None:
+    """Проверяет типы полей, которые схема регистрации не проверяет."""
+    for field in OPTIONAL_TEXT_FIELDS:
+        value = record.get(field)
+        if value is not None and not isinstance(value, str):
+            raise ImportRowError(
+                f"Поле {field} должно быть строкой, получено {type(value).__name__}"
+            )
+
+
+def iter_records(
+    path: str, file_format: Optional[str] = None
+) -> Iterator[Union[dict, ImportRowError]]:
+    """
+    Потоково читает записи из NDJSON или CSV; формат определяется по расширению.
+    Вместо некорректной строки NDJSON возвращается ImportRowError с номером строки,
+    чтобы она попала в отчет, а не прерывала импорт.
+    """
+    file_format = file_format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            yield from csv.DictReader(f)
+        elif file_format == "ndjson":
+            for line_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield ImportRowError(
+                            f"Строка {line_number}: некорректный JSON: {e}"
+                        )
+        else:
+            raise ValueError(f"Неизвестный формат файла импорта: {file_format}")
+
+
+class ImportReport:
+    """Счетчики импорта и время каждого этапа."""
+
+    def __init__(self, skipped: int = 0):
+        self.skipped = skipped  # Строки, обработанные предыдущими запусками
+        self.processed = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[Dict[str, object]] = []
+        self.stage_rows = dict.fromkeys(STAGES, 0)
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self.started_at = time.perf_counter()
+
+    def add_error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def add_stage(self, stage: str, rows: int, seconds: float) -> None:
+        self.stage_rows[stage] += rows
+        self.stage_seconds[stage] += seconds
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "skipped": self.skipped,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "elapsed": round(elapsed, 3),
+            "rows_per_sec": round(self.processed / elapsed, 1) if elapsed else 0.0,
+            "stages": {
+                stage: {
+                    "rows": self.stage_rows[stage],
+                    "seconds": round(self.stage_seconds[stage], 3),
+                    "rows_per_sec": round(
+                        self.stage_rows[stage] / self.stage_seconds[stage], 1
+                    )
+                    if self.stage_seconds[stage]
+                    else 0.0,
+                }
+                for stage in STAGES
+            },
+            "errors": self.errors,
+        }
+
+
+class ImportCheckpoint:
+    """Файл с числом уже импортированных строк исходного файла."""
+
+    def __init__(self, path: Optional[str], source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        # Контрольная точка от другого файла не применяется
+        if data.get("source") != self.source:
+            return 0
+        return int(data.get("processed", 0))
+
+    def save(self, processed: int) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            json.dump({"source": self.source, "processed": processed}, tmp)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class ParticipantImporter:
+    """
+    Импорт участников пакетами по batch_size строк. Внутри пакета хэширование,
+    обработка аватаров и геокодирование выполняются параллельно, вставка —
+    одним запросом с одной транзакцией на пакет.
+    """
+
+    def __init__(
+        self,
+        avatar_dir: Optional[str] = None,
+        batch_size: int = 500,
+        checkpoint_path: Optional[str] = None,
+    ):
+        self.avatar_dir = os.path.abspath(avatar_dir) if avatar_dir else None
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        # Не больше задач, чем допускает очередь пула изображений
+        self._avatar_slots = asyncio.Semaphore(image_worker_pool.max_pending)
+
+    def _avatar_path(self, name: str) -> str:
+        if self.avatar_dir is None:
+            raise ImportRowError("Каталог аватаров не задан")
+        path = os.path.abspath(os.path.join(self.avatar_dir, name))
+        if os.path.commonpath([path, self.avatar_dir]) != self.avatar_dir:
+            raise ImportRowError(f"Недопустимый путь к аватару: {name}")
+        return path
+
+    async def _process_avatar(self, name: str) -> Tuple[str, Dict[str, str]]:
+        from PIL import Image
+
+        path = self._avatar_path(name)
+        try:
+            content = await asyncio.to_thread(_read_file, path)
+        except OSError as e:
+            raise ImportRowError(f"Не удалось прочитать аватар {name}: {e}")
+        async with self._avatar_slots:
+            try:
+                processed = await process_avatar(content)
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                # Pillow сообщает о неподдерживаемом изображении через OSError,
+                # о слишком маленьком — через ValueError; остальные ошибки
+                # (переполнение пула, сбой воркера) прерывают импорт
+                raise ImportRowError(f"Некорректное изображение {name}: {e}")
+        store = get_blob_store()
+        avatar_key = await asyncio.to_thread(store.put, processed.original)
+        avatar_variants = await asyncio.to_thread(store.put_many, processed.variants)
+        return avatar_key, avatar_variants
+
+    async def _timed(self, report: ImportReport, stage: str, rows: int, coro):
+        started_at = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            report.add_stage(stage, rows, time.perf_counter() - started_at)
+
+    async def _import_batch(
+        self,
+        db: AsyncSession,
+        batch: List[Tuple[int, Union[dict, ImportRowError]]],
+        report: ImportReport,
+    ) -> None:
+        report.processed += len(batch)
+
+        # Разбор и валидация схемой регистрации
+        started_at = time.perf_counter()
+        valid: List[Tuple[int, ParticipantCreate, dict]] = []
+        for row, record in batch:
+            if isinstance(record, ImportRowError):
+                report.add_error(row, str(record))
+                continue
+            try:
+                data = ParticipantCreate(**record)
+                _check_optional_fields(record)
+                valid.append((row, data, record))
+            except (ValidationError, TypeError, ImportRowError) as e:
+                report.add_error(row, str(e))
+
+        # Повторы внутри пакета и уже зарегистрированные email
+        existing = await ParticipantCRUD.get_existing_emails(
+            db, [data.email for _, data, _ in valid]
+        )
+        unique = []
+        for row, data, record in valid:
+            if data.email in existing:
+                report.duplicates += 1
+                continue
+            existing.add(data.email)
+            unique.append((row, data, record))
+        report.add_stage("parse", len(batch), time.perf_counter() - started_at)
+        if not unique:
+            return
+
+        cities = {
+            normalize_city(record["city"])
+            for _, _, record in unique
+            if record.get("city")
+        }
+        cities.discard("")
+        avatars = [record.get("avatar") or None for _, _, record in unique]
+
+        hashes, avatar_results, geocoded = await asyncio.gather(
+            self._timed(
+                report,
+                "hash",
+                len(unique),
+                asyncio.gather(
+                    *(
+                        user_hash_manager.hash_password_async(data.password)
+                        for _, data, _ in unique
+                    )
+                ),
+            ),
+            self._timed(
+                report,
+                "avatar",
+                sum(1 for name in avatars if name),
+                asyncio.gather(
+                    *(
+                        self._process_avatar(name) if name else _no_avatar()
+                        for name in avatars
+                    ),
+                    return_exceptions=True,
+                ),
+            ),
+            self._timed(report, "geocode", len(cities), self._geocode_cities(cities)),
+        )
+
+        rows = []
+        for (row, data, record), hashed_password, avatar in zip(
+            unique, hashes, avatar_results
+        ):
+            if isinstance(avatar, ImportRowError):
+                report.add_error(row, str(avatar))
+                continue
+            if isinstance(avatar, BaseException):
+                raise avatar
+            city = record.get("city") or None
+            coordinates = geocoded.get(normalize_city(city)) if city else None
+            rows.append(
+                {
+                    "avatar_key": avatar[0],
+                    "avatar_variants": avatar[1],
+                    "gender": data.gender,
+                    "first_name": data.first_name,
+                    "last_name": data.last_name,
+                    "email": data.email,
+                    "hashed_password": hashed_password,
+                    "latitude": str(coordinates.latitude) if coordinates else None,
+                    "longitude": str(coordinates.longitude) if coordinates else None,
+                    "city": coordinates.display_name if coordinates else city,
+                }
+            )
+
+        inserted = await self._timed(
+            report,
+            "insert",
+            len(rows),
+            ParticipantCRUD.bulk_insert_participants(db, rows),
+        )
+        report.inserted += inserted
+        # Email, занятые параллельной регистрацией между проверкой и вставкой
+        report.duplicates += len(rows) - inserted
+
+    async def _geocode_cities(self, cities) -> Dict[str, Optional[GeoResult]]:
+        cities = list(cities)
+        results = await asyncio.gather(
+            *(geocoding_service.get_coordinates(city) for city in cities)
+        )
+        return dict(zip(cities, results))
+
+    async def run(
+        self, db: AsyncSession, source: str, file_format: Optional[str] = None
+    ) -> ImportReport:
+        """Импортирует файл source, продолжая с контрольной точки, если она есть."""
+        checkpoint = ImportCheckpoint(self.checkpoint_path, source)
+        skip = checkpoint.load()
+        report = ImportReport(skipped=skip)
+        if skip:
+            logger.info("Импорт %s продолжается со строки %d", source, skip + 1)
+
+        position = skip
+        batch: List[Tuple[int, Union[dict, ImportRowError]]] = []
+        records = iter_records(source, file_format)
+        for row, record in enumerate(records, start=1):
+            if row <= skip:
+                continue
+            batch.append((row, record))
+            if len(batch) >= self.batch_size:
+                await self._import_batch(db, batch, report)
+                position = row
+                checkpoint.save(position)
+                logger.info(
+                    "Импортировано строк: %d, вставлено: %d", position, report.inserted
+                )
+                batch = []
+        if batch:
+            await self._import_batch(db, batch, report)
+        checkpoint.clear()
+        if report.inserted:
+            discover_engine.on_participants_created()
+        return report
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def _no_avatar() -> Tuple[None, None]:
+    return None, None
+
+
+async def import_participants(
+    source: str,
+    avatar_dir: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    checkpoint_path: Optional[str] = None,
+    file_format: Optional[str] = None,
+) -> dict:
+    """Импорт файла в отдельной сессии БД; возвращает отчет в виде словаря."""
+    importer = ParticipantImporter(
+        avatar_dir=avatar_dir,
+        batch_size=batch_size or settings.IMPORT_BATCH_SIZE,
+        checkpoint_path=checkpoint_path,
+    )
+    async with async_session() as db:
+        report = await importer.run(db, source, file_format)
+    return report.as_dict()
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    image_worker_pool.start()
+    await geocoding_service.start()
+    try:
+        return await import_participants(
+            args.source,
+            avatar_dir=args.avatars,
+            batch_size=args.batch_size,
+            checkpoint_path=args.checkpoint or f"{args.source}.checkpoint",
+            file_format=args.format,
+        )
+    finally:
+        image_worker_pool.shutdown()
+        await geocoding_service.close()
+        user_hash_manager.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Массовый импорт участников")
+    parser.add_argument("source", help="Файл NDJSON или CSV с участниками")
+    parser.add_argument("--avatars", help="Каталог с файлами аватаров")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Формат файла")
+    parser.add_argument("--batch-size", type=int, help="Размер пакета вставки")
+    parser.add_argument(
+        "--checkpoint", help="Файл контрольной точки (по умолчанию <source>.checkpoint)"
+    )
+    report = asyncio.run(_main(parser.parse_args()))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
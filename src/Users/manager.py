@@ -1,9 +1,67 @@
-from argon2 import PasswordHasher
+import asyncio
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from argon2 import PasswordHasher, Parameters, profiles
+from argon2.exceptions import InvalidHashError
+
+from config import settings
+from src.utils.metrics import password_hash_duration
+
+# Профили параметров Argon2; "default" соответствует PasswordHasher() по умолчанию
+ARGON2_PROFILES = {
+    "default": profiles.RFC_9106_LOW_MEMORY,
+    "rfc9106_low_memory": profiles.RFC_9106_LOW_MEMORY,
+    "rfc9106_high_memory": profiles.RFC_9106_HIGH_MEMORY,
+    "cheapest": profiles.CHEAPEST,  # Только для тестов и бенчмарков
+}
+
+
+def argon2_parameters(
+    profile: str = "default",
+    time_cost: Optional[int] = None,
+    memory_cost: Optional[int] = None,
+    parallelism: Optional[int] = None,
+) -> Parameters:
+    """Параметры Argon2 из профиля с необязательным переопределением отдельных значений."""
+    try:
+        params = ARGON2_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Неизвестный профиль Argon2: {profile}")
+    overrides = {
+        "time_cost": time_cost,
+        "memory_cost": memory_cost,
+        "parallelism": parallelism,
+    }
+    return dataclasses.replace(
+        params, **{k: v for k, v in overrides.items() if v is not None}
+    )
 
 
 class UserHashManager:
-    def __init__(self, ph=PasswordHasher()):
-        self.ph = ph
+    """
+    Хэширование паролей Argon2. Асинхронные методы выполняют вычисления
+    в отдельном ограниченном пуле потоков, не блокируя event loop
+    (argon2-cffi освобождает GIL на время хэширования).
+    """
+
+    def __init__(self, ph: Optional[PasswordHasher] = None, max_workers: int = 2):
+        self.ph = ph or PasswordHasher()
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hasher"
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
 
     def hash_password(self, password: str) -> str:
         """Создает хэш пароля."""
@@ -16,5 +74,43 @@ class UserHashManager:
         except Exception:
             return False
 
+    def check_needs_rehash(self, stored_hashed_password: str) -> bool:
+        """Проверяет, создан ли хэш с устаревшими параметрами и нужно ли его пересчитать."""
+        try:
+            return self.ph.check_needs_rehash(stored_hashed_password)
+        except InvalidHashError:
+            return True
+
+    async def hash_password_async(self, password: str) -> str:
+        """Создает хэш пароля в пуле потоков."""
+        loop = asyncio.get_running_loop()
+        with password_hash_duration.time(operation="hash"):
+            return await loop.run_in_executor(
+                self._get_executor(), self.hash_password, password
+            )
+
+    async def check_password_async(
+        self, stored_hashed_password: str, input_password: str
+    ) -> bool:
+        """Проверяет пароль в пуле потоков."""
+        loop = asyncio.get_running_loop()
+        with password_hash_duration.time(operation="verify"):
+            return await loop.run_in_executor(
+                self._get_executor(),
+                self.check_password,
+                stored_hashed_password,
+                input_password,
+            )
+
 
-user_hash_manager = UserHashManager()
+user_hash_manager = UserHashManager(
+    PasswordHasher.from_parameters(
+        argon2_parameters(
+            settings.ARGON2_PROFILE,
+            settings.ARGON2_TIME_COST,
+            settings.ARGON2_MEMORY_COST,
+            settings.ARGON2_PARALLELISM,
+        )
+    ),
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+)
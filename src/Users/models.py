@@ -3,23 +3,28 @@ from sqlalchemy import (
     String,
     Integer,
     Boolean,
-    LargeBinary,
+    Float,
+    JSON,
     ForeignKey,
     DateTime,
     UniqueConstraint,
+    Index,
 )
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from datetime import datetime
-
-Base = declarative_base()
+from db import Base
+from .search import attach_search_ddl
 
 
 class Participant(Base):
     __tablename__ = "participants"
 
     id = Column(Integer, primary_key=True, index=True)
-    avatar = Column(LargeBinary)
+    # Ключ аватара в хранилище (SHA-256 содержимого), сами байты в БД не хранятся
+    avatar_key = Column(String(64), nullable=True)
+    # Производные аватара: "<размер>.<формат>" -> ключ в хранилище
+    avatar_variants = Column(JSON, nullable=True)
     gender = Column(String, nullable=False)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
@@ -28,8 +33,39 @@ class Participant(Base):
     longitude = Column(String, nullable=True)
     latitude = Column(String, nullable=True)
     city = Column(String, nullable=True)  # Новое поле city
+    # Числовые координаты и ячейка сетки для префильтра поиска по расстоянию
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+    geo_cell = Column(Integer, nullable=True)
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, server_default=func.now())
+    # Готовность данных, обрабатываемых в фоне после регистрации: pending, ready, failed
+    avatar_status = Column(String(16), nullable=False, server_default="ready")
+    location_status = Column(String(16), nullable=False, server_default="ready")
+    # Счетчики, обновляемые вместе с лайками: входящие лайки и взаимные симпатии
+    likes_received_count = Column(Integer, nullable=False, server_default="0")
+    mutual_matches_count = Column(Integer, nullable=False, server_default="0")
+    # В SQLite CURRENT_TIMESTAMP хранится без микросекунд; параметры запросов
+    # должны иметь тот же формат, иначе строковое сравнение в keyset-пагинации ломается
+    created_at = Column(
+        DateTime().with_variant(
+            sqlite.DATETIME(
+                storage_format="%(year)04d-%(month)02d-%(day)02d "
+                "%(hour)02d:%(minute)02d:%(second)02d"
+            ),
+            "sqlite",
+        ),
+        server_default=func.now(),
+    )
+
+    __table_args__ = (
+        Index("ix_participants_geo_cell_lat_lon", "geo_cell", "lat", "lon"),
+        Index("ix_participants_lat_lon", "lat", "lon"),
+        Index("ix_participants_created_at_id", "created_at", "id"),
+    )
+
+
+# Поисковый индекс по имени создается вместе с таблицей
+attach_search_ddl(Participant.__table__)
 
 
 class Match(Base):
@@ -42,4 +78,22 @@ class Match(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "target_user_id", name="unique_match"),
+        Index("ix_matches_user_id_created_at", "user_id", "created_at"),
+        Index("ix_matches_target_user_id_created_at", "target_user_id", "created_at"),
+    )
+
+
+class MutualMatch(Base):
+    """Взаимная симпатия; хранится по строке на каждого из двух участников."""
+
+    __tablename__ = "mutual_matches"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("participants.id"), nullable=False)
+    partner_id = Column(Integer, ForeignKey("participants.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "partner_id", name="unique_mutual_match"),
+        Index("ix_mutual_matches_user_id_created_at", "user_id", "created_at"),
     )
@@ -0,0 +1,177 @@
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from .crud import MatchCRUD
+
+
+class LikeQuotaBackend(ABC):
+    """Дневной лимит лайков участника."""
+
+    # Лимит, который MatchCRUD.like проверяет в SQL; None — бэкенд проверяет сам
+    sql_limit: Optional[int] = None
+
+    @abstractmethod
+    async def acquire(self, db: AsyncSession, user_id: int) -> bool:
+        """Резервирует лайк в квоте участника. False — лимит исчерпан."""
+
+    def release(self, user_id: int) -> None:
+        """Возвращает зарезервированный лайк, если он не был поставлен."""
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class DatabaseLikeQuota(LikeQuotaBackend):
+    """
+    Проверка лимита в самом INSERT через COUNT по индексу (user_id, created_at).
+    Корректна при любом числе процессов, но стоит запроса к БД на каждый лайк.
+    """
+
+    def __init__(self, limit: int):
+        self.sql_limit = limit
+
+    async def acquire(self, db: AsyncSession, user_id: int) -> bool:
+        return True
+
+
+class _Window:
+    """Кольцо счетчиков по корзинам фиксированной длины."""
+
+    __slots__ = ("counts", "last_bucket", "total")
+
+    def __init__(self, buckets: int, current_bucket: int):
+        self.counts = array("I", [0]) * buckets
+        self.last_bucket = current_bucket
+        self.total = 0
+
+    def advance(self, bucket: int) -> None:
+        """Обнуляет корзины, вышедшие из окна к моменту bucket."""
+        size = len(self.counts)
+        if bucket - self.last_bucket >= size:
+            self.counts = array("I", [0]) * size
+            self.total = 0
+        else:
+            for stale in range(self.last_bucket + 1, bucket + 1):
+                index = stale % size
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+        self.last_bucket = max(self.last_bucket, bucket)
+
+    def add(self, bucket: int, amount: int = 1) -> None:
+        if self.last_bucket - bucket >= len(self.counts):
+            return
+        index = bucket % len(self.counts)
+        amount = max(amount, -self.counts[index])
+        self.counts[index] += amount
+        self.total += amount
+
+
+class MemoryLikeQuota(LikeQuotaBackend):
+    """
+    Скользящее окно в памяти процесса: на участника хранится кольцо из buckets
+    счетчиков (окно window секунд). Счетчики заполняются из БД при первом обращении,
+    неактивные записи вытесняются. Лимит соблюдается в пределах одного процесса;
+    для нескольких воркеров uvicorn нужен общий бэкенд.
+    """
+
+    def __init__(self, limit: int, window: float, buckets: int, max_users: int):
+        self.limit = limit
+        self.window = window
+        self.buckets = buckets
+        self.bucket_seconds = window / buckets
+        self.max_users = max_users
+        self._windows: "OrderedDict[int, _Window]" = OrderedDict()
+        self.warmups = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _build(self, timestamps: Iterable[float], now: float) -> _Window:
+        current = self._bucket(now)
+        window = _Window(self.buckets, current)
+        for timestamp in timestamps:
+            window.add(self._bucket(timestamp))
+        return window
+
+    def _evict(self, now: float) -> None:
+        # Записи упорядочены по последнему обращению: сначала самые давние
+        idle_bucket = self._bucket(now) - self.buckets
+        while self._windows:
+            user_id, window = next(iter(self._windows.items()))
+            if (
+                len(self._windows) <= self.max_users
+                and window.last_bucket > idle_bucket
+            ):
+                break
+            del self._windows[user_id]
+            self.evictions += 1
+
+    async def _warm(self, db: AsyncSession, user_id: int, now: float) -> _Window:
+        since = datetime.fromtimestamp(now - self.window, tz=timezone.utc).replace(
+            tzinfo=None
+        )
+        like_times = await MatchCRUD.get_like_times_since(db, user_id, since)
+        # Пока шел запрос, запись могла создать параллельная корутина
+        window = self._windows.get(user_id)
+        if window is None:
+            self.warmups += 1
+            window = self._build(
+                (t.replace(tzinfo=timezone.utc).timestamp() for t in like_times), now
+            )
+            self._windows[user_id] = window
+        return window
+
+    async def acquire(self, db: AsyncSession, user_id: int) -> bool:
+        now = time.time()
+        window = self._windows.get(user_id)
+        if window is None:
+            window = await self._warm(db, user_id, now)
+        self._windows.move_to_end(user_id)
+
+        bucket = self._bucket(now)
+        window.advance(bucket)
+        if window.total >= self.limit:
+            self.rejected += 1
+            return False
+        window.add(bucket)
+        self._evict(now)
+        return True
+
+    def release(self, user_id: int) -> None:
+        window = self._windows.get(user_id)
+        if window is not None:
+            window.add(window.last_bucket, -1)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._windows),
+            "warmups": self.warmups,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+        }
+
+
+def create_like_quota() -> LikeQuotaBackend:
+    """Бэкенд лимита лайков, выбранный настройкой LIKE_QUOTA_BACKEND."""
+    if settings.LIKE_QUOTA_BACKEND == "memory":
+        return MemoryLikeQuota(
+            settings.MAX_LIKES_PER_DAY,
+            timedelta(days=1).total_seconds(),
+            settings.LIKE_QUOTA_BUCKETS,
+            settings.LIKE_QUOTA_MAX_USERS,
+        )
+    if settings.LIKE_QUOTA_BACKEND == "database":
+        return DatabaseLikeQuota(settings.MAX_LIKES_PER_DAY)
+    raise ValueError(f"Неизвестный бэкенд лимита лайков: {settings.LIKE_QUOTA_BACKEND}")
+
+
+like_quota = create_like_quota()
@@ -6,28 +6,87 @@ from fastapi import (
     UploadFile,
     File,
     Form,
+    Header,
     Query,
+    Request,
 )
-from fastapi.responses import StreamingResponse
+from fastapi.responses import (
+    FileResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.Users.schemas import (
     ParticipantCreate,
     ParticipantResponse,
+    ParticipantListResponse,
+    DiscoverResponse,
+    ParticipantStatusResponse,
+    ConnectionListResponse,
     MatchRequest,
     MatchResponse,
     GenderEnum,
+    participant_payload,
 )
-from src.Users.crud import ParticipantCRUD, MatchCRUD
+from src.Users.crud import ParticipantCRUD, MatchCRUD, LikeStatus, nearby_cache
 from src.Users.manager import user_hash_manager
-from src.utils.image_processing import add_watermark
-from src.utils.geolocation import get_coordinates_from_city
-from db import get_db
+from src.Users.quota import like_quota
+from src.Users.importer import import_participants
+from src.Users.discover import discover_engine, FeedParams
+from src.Users.tasks import (
+    AVATAR_JOB,
+    GEOCODE_JOB,
+    STATUS_PENDING,
+    STATUS_READY,
+)
+from src.utils.image_processing import (
+    choose_avatar_variant,
+    image_worker_pool,
+    is_valid_image,
+)
+from src.utils.geolocation import geocoding_service
+from src.utils.jobs import job_queue
+from src.utils.pagination import decode_cursor, next_cursor, paginate_sorted
+from src.utils.blob_store import get_blob_store
+from src.utils.cache import AsyncTTLCache
+from src.utils.versions import PARTICIPANTS_VERSION, change_versions
+from db import get_read_db, get_write_db, read_session
 from config import settings
-from io import BytesIO
-from typing import Optional, List
+from typing import Optional
+import hashlib
+import orjson
+import os
+import secrets
+import shutil
+import tempfile
 
 router = APIRouter(prefix="/api/clients", tags=["Участники"])
 
+# Аватар участника не меняется после регистрации, поэтому ключ можно долго кэшировать
+avatar_key_cache = AsyncTTLCache("avatar_keys", maxsize=100_000, ttl=24 * 60 * 60)
+
+# Сериализованные страницы /list; ключ содержит версию таблицы участников,
+# поэтому после изменений старые записи не используются и вытесняются по LRU
+list_response_cache = (
+    AsyncTTLCache(
+        "list_responses",
+        maxsize=settings.LIST_RESPONSE_CACHE_SIZE,
+        ttl=settings.LIST_RESPONSE_CACHE_TTL,
+    )
+    if settings.LIST_RESPONSE_CACHE_SIZE > 0
+    else None
+)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Совпадает ли ETag с одним из значений If-None-Match (слабое сравнение)."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
 
 @router.post(
     "/create",
@@ -43,9 +102,12 @@ async def create_participant(
     password: str = Form(..., description="Пароль для доступа"),
     avatar: UploadFile = File(..., description="Файл аватарки участника"),
     city: Optional[str] = Form(None, description="Город участника"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
 ):
-    """Эндпоинт для регистрации участника с водяным знаком на аватарке и определением координат по городу."""
+    """
+    Эндпоинт для регистрации участника. Водяной знак на аватарке и координаты
+    по городу обрабатываются в фоне; готовность видна в /{id}/status.
+    """
 
     existing_participant = await ParticipantCRUD.get_participant_by_email(db, email)
     if existing_participant:
@@ -53,18 +115,20 @@ async def create_participant(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Email уже используется"
         )
 
-    hashed_password = user_hash_manager.hash_password(password)
+    hashed_password = await user_hash_manager.hash_password_async(password)
 
     avatar_content = await avatar.read()
-    avatar_with_watermark = await add_watermark(BytesIO(avatar_content))
-    avatar_with_watermark.seek(0)
-    avatar_bytes = avatar_with_watermark.read()
+    if not await run_in_threadpool(is_valid_image, avatar_content):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Файл аватарки не является изображением",
+        )
+    store = get_blob_store()
+    upload_key = await run_in_threadpool(store.put, avatar_content)
 
-    latitude, longitude, display_city = None, None, city
+    jobs = [(AVATAR_JOB, {"upload_key": upload_key})]
     if city:
-        coordinates = await get_coordinates_from_city(city)
-        if coordinates:
-            latitude, longitude, display_city = coordinates
+        jobs.append((GEOCODE_JOB, {"city": city}))
 
     participant_data = ParticipantCreate(
         gender=gender,
@@ -77,16 +141,18 @@ async def create_participant(
         db,
         participant_data,
         hashed_password,
-        avatar=avatar_bytes,
-        latitude=str(latitude) if latitude else None,
-        longitude=str(longitude) if longitude else None,
-        city=display_city,
+        avatar_key=None,
+        city=city,
+        avatar_status=STATUS_PENDING,
+        location_status=STATUS_PENDING if city else STATUS_READY,
+        jobs=jobs,
     )
     if not new_participant:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Ошибка при создании участника",
         )
+    discover_engine.on_participants_created()
 
     avatar_url = f"{settings.BASE_URL}/api/clients/avatar/{new_participant.id}"
 
@@ -95,6 +161,27 @@ async def create_participant(
     )
 
 
+@router.get(
+    "/{id}/status",
+    response_model=ParticipantStatusResponse,
+    description="Готовность аватара и координат после регистрации",
+)
+async def get_participant_status(id: int, db: AsyncSession = Depends(get_read_db)):
+    """Эндпоинт статуса фоновой обработки аватара и геокодирования."""
+    statuses = await ParticipantCRUD.get_processing_status(db, id)
+    if statuses is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Участник не найден"
+        )
+    avatar_status, location_status = statuses
+    return ParticipantStatusResponse(
+        id=id,
+        avatar_status=avatar_status,
+        location_status=location_status,
+        ready=avatar_status != STATUS_PENDING and location_status != STATUS_PENDING,
+    )
+
+
 @router.get(
     "/avatar/{id}",
     description="Получение аватара участника по ID",
@@ -102,20 +189,53 @@ async def create_participant(
 )
 async def get_avatar(
     id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    size: Optional[int] = Query(
+        None, ge=1, description="Желаемый размер стороны аватара в пикселях"
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Эндпоинт для получения аватара участника по его ID."""
-    participant = await ParticipantCRUD.get_participant_by_id(db, id)
-    if not participant or not participant.avatar:
+    """Эндпоинт для получения аватара участника по его ID с выбором размера и формата."""
+    avatar_keys = await avatar_key_cache.get_or_load(
+        id, lambda: ParticipantCRUD.get_avatar_keys(db, id)
+    )
+    if not avatar_keys or not avatar_keys[0]:
+        avatar_key_cache.invalidate(id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Аватар не найден"
         )
 
-    # Возвращаем аватар как потоковый ответ
-    return StreamingResponse(
-        BytesIO(participant.avatar),
-        media_type="image/jpeg",  # Укажите корректный MIME тип в зависимости от формата аватара
+    # Формат выбирается по Accept; без производных отдается исходный PNG
+    avatar_key, avatar_variants = avatar_keys
+    media_type = "image/png"
+    variant = choose_avatar_variant(
+        avatar_variants or {}, size, request.headers.get("accept", "")
     )
+    if variant is not None:
+        avatar_key, media_type = avatar_variants[variant[0]], variant[1]
+
+    # Ключ — хэш содержимого, поэтому служит сильным ETag
+    headers = {
+        "ETag": f'"{avatar_key}"',
+        "Cache-Control": f"public, max-age={settings.AVATAR_CACHE_MAX_AGE}",
+        "Vary": "Accept",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    store = get_blob_store()
+    path = store.path(avatar_key)
+    if path is not None:
+        # FileResponse отдает файл потоком (sendfile, если сервер поддерживает)
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    content = await run_in_threadpool(store.get, avatar_key)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Аватар не найден"
+        )
+    return Response(content, media_type=media_type, headers=headers)
 
 
 @router.post(
@@ -126,43 +246,201 @@ async def get_avatar(
 async def match_participant(
     id: int,
     match_request: MatchRequest,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_write_db),
 ):
     """Оценка участником другого участника с проверкой на лимит."""
     user_id = match_request.user_id
 
-    daily_likes_count = await MatchCRUD.get_daily_likes_count(db, user_id)
-    if daily_likes_count >= settings.MAX_LIKES_PER_DAY:
+    if not await like_quota.acquire(db, user_id):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Лимит лайков на сегодня исчерпан",
         )
-
     try:
-        await MatchCRUD.create_match(db, user_id, id)
+        result = await MatchCRUD.like(db, user_id, id, like_quota.sql_limit)
     except Exception:
+        like_quota.release(user_id)
+        raise
+    if result.status in (LikeStatus.CREATED, LikeStatus.MUTUAL):
+        discover_engine.on_like(user_id, id)
+    else:
+        like_quota.release(user_id)
+
+    if result.status == LikeStatus.OVER_QUOTA:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Лимит лайков на сегодня исчерпан",
+        )
+    if result.status == LikeStatus.DUPLICATE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Вы уже поставили лайк",
         )
+    if result.status == LikeStatus.NOT_FOUND:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Участник не найден"
+        )
+    if result.status == LikeStatus.MUTUAL:
+        return MatchResponse(
+            message=f"Взаимная симпатия с {result.target_first_name}!",
+            email=result.target_email,
+        )
+    return MatchResponse(message="Лайк добавлен, но взаимной симпатии нет.")
 
-    if await MatchCRUD.check_mutual_like(db, user_id, id):
-        target_participant = await ParticipantCRUD.get_participant_by_id(db, id)
-        if target_participant:
-            return MatchResponse(
-                message=f"Взаимная симпатия с {target_participant.first_name}!",
-                email=target_participant.email,
-            )
+
+@router.get(
+    "/{id}/discover",
+    response_model=DiscoverResponse,
+    description="Лента кандидатов для оценки: участники рядом, которым еще не поставлен лайк",
+)
+async def discover_participants(
+    id: int,
+    gender: Optional[str] = Query(None, description="Фильтр по полу"),
+    distance: Optional[float] = Query(
+        None, gt=0, description="Максимальная дистанция в км (по умолчанию из настроек)"
+    ),
+    limit: int = Query(
+        settings.DISCOVER_PAGE_SIZE,
+        ge=1,
+        le=settings.DISCOVER_QUEUE_SIZE,
+        description="Количество кандидатов",
+    ),
+    reset: bool = Query(False, description="Начать ленту заново"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Эндпоинт ленты: каждый вызов возвращает следующих, еще не показанных кандидатов."""
+    participant = await ParticipantCRUD.get_participant_by_id(db, id)
+    if participant is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Участник не найден"
+        )
+
+    # Без координат участника лента строится без ограничения по расстоянию
+    if participant.lat is not None and participant.lon is not None:
+        params = FeedParams(
+            participant.lat,
+            participant.lon,
+            distance or settings.DISCOVER_DISTANCE_KM,
+            gender,
+        )
     else:
-        return MatchResponse(message="Лайк добавлен, но взаимной симпатии нет.")
+        params = FeedParams(None, None, None, gender)
+
+    candidate_ids = await discover_engine.next_page(db, id, params, limit, reset)
+    candidates = await ParticipantCRUD.get_participants_by_ids(db, candidate_ids)
+    return DiscoverResponse(
+        items=[
+            ParticipantResponse.from_orm_with_avatar(
+                p, avatar_url=f"{settings.BASE_URL}/api/clients/avatar/{p.id}"
+            )
+            for p in candidates
+        ],
+        exhausted=discover_engine.is_exhausted(id),
+    )
+
+
+async def _connections_page(
+    db: AsyncSession,
+    id: int,
+    limit: int,
+    cursor: Optional[str],
+    fetch,
+    total_of,
+) -> ConnectionListResponse:
+    """Страница взаимных симпатий или входящих лайков; total берется из счетчика участника."""
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+            )
+    participant = await ParticipantCRUD.get_participant_by_id(db, id)
+    if participant is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Участник не найден"
+        )
+
+    rows = await fetch(db, id, limit + 1, position)
+    page, cursor_next = next_cursor(rows, limit, lambda row: (row[1], row[2]))
+    return ConnectionListResponse(
+        items=[
+            ParticipantResponse.from_orm_with_avatar(
+                p, avatar_url=f"{settings.BASE_URL}/api/clients/avatar/{p.id}"
+            )
+            for p, _, _ in page
+        ],
+        total=total_of(participant),
+        next_cursor=cursor_next,
+    )
+
+
+@router.get(
+    "/{id}/matches",
+    response_model=ConnectionListResponse,
+    description="Взаимные симпатии участника, сначала новые",
+)
+async def get_mutual_matches(
+    id: int,
+    limit: int = Query(
+        settings.LIST_PAGE_SIZE,
+        ge=1,
+        le=settings.LIST_MAX_PAGE_SIZE,
+        description="Количество участников на странице",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор страницы из поля next_cursor предыдущего ответа"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Эндпоинт списка взаимных симпатий."""
+    return await _connections_page(
+        db,
+        id,
+        limit,
+        cursor,
+        MatchCRUD.get_mutual_matches,
+        lambda p: p.mutual_matches_count,
+    )
+
+
+@router.get(
+    "/{id}/likes",
+    response_model=ConnectionListResponse,
+    description="Участники, поставившие лайк, сначала новые",
+)
+async def get_incoming_likes(
+    id: int,
+    limit: int = Query(
+        settings.LIST_PAGE_SIZE,
+        ge=1,
+        le=settings.LIST_MAX_PAGE_SIZE,
+        description="Количество участников на странице",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор страницы из поля next_cursor предыдущего ответа"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Эндпоинт списка входящих лайков."""
+    return await _connections_page(
+        db,
+        id,
+        limit,
+        cursor,
+        MatchCRUD.get_incoming_likes,
+        lambda p: p.likes_received_count,
+    )
 
 
 @router.get(
     "/list",
-    response_model=List[ParticipantResponse],
+    response_model=ParticipantListResponse,
     description="Эндпоинт для получения списка участников с возможностью фильтрации по расстоянию и другим параметрам",
 )
 async def get_participants(
+    request: Request,
     gender: Optional[str] = Query(None, description="Фильтр по полу"),
     first_name: Optional[str] = Query(None, description="Фильтр по имени"),
     last_name: Optional[str] = Query(None, description="Фильтр по фамилии"),
@@ -174,36 +452,253 @@ async def get_participants(
     base_lon: Optional[float] = Query(
         None, description="Долгота для фильтрации по расстоянию"
     ),
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(
+        settings.LIST_PAGE_SIZE,
+        ge=1,
+        le=settings.LIST_MAX_PAGE_SIZE,
+        description="Количество участников на странице",
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Курсор страницы из поля next_cursor предыдущего ответа"
+    ),
+    q: Optional[str] = Query(
+        None,
+        min_length=1,
+        max_length=100,
+        description="Поиск по имени и фамилии (по началу слов), результаты по релевантности",
+    ),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Эндпоинт для получения списка участников с фильтрацией по полу, имени, фамилии и расстоянию."""
+    """
+    Эндпоинт для получения списка участников с фильтрацией по полу, имени, фамилии и расстоянию.
+    ETag строится из параметров и версии таблицы участников: на совпадающий
+    If-None-Match отвечает 304 без запроса участников.
+    """
     if distance and (base_lat is None or base_lon is None):
         raise HTTPException(
             status_code=400,
             detail="Для фильтрации по расстоянию необходимы базовые координаты (base_lat и base_lon).",
         )
+    if q is not None and (distance or cursor):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Поиск q не совмещается с фильтром по расстоянию и курсором",
+        )
+
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный курсор"
+            )
+
+    version = await change_versions.get(db, PARTICIPANTS_VERSION)
+    key = (
+        version,
+        gender,
+        first_name,
+        last_name,
+        sort_by_date,
+        distance,
+        base_lat,
+        base_lon,
+        limit,
+        cursor,
+        q,
+    )
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).hexdigest()
+    headers = {"ETag": f'"{version}-{digest}"'}
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    async def render() -> bytes:
+        page, cursor_next = await _list_page(
+            db,
+            gender,
+            first_name,
+            last_name,
+            sort_by_date,
+            distance,
+            base_lat,
+            base_lon,
+            limit,
+            position,
+            q,
+        )
+        # Строки из БД сериализуются напрямую, без построения и повторной проверки моделей;
+        # response_model остается для схемы OpenAPI
+        return orjson.dumps(
+            {
+                "items": [
+                    participant_payload(
+                        p, avatar_url=f"{settings.BASE_URL}/api/clients/avatar/{p.id}"
+                    )
+                    for p in page
+                ],
+                "next_cursor": cursor_next,
+            }
+        )
 
-    if distance:
+    if list_response_cache is not None:
+        content = await list_response_cache.get_or_load(key, render)
+    else:
+        content = await render()
+    return Response(content, media_type="application/json", headers=headers)
+
+
+async def _list_page(
+    db: AsyncSession,
+    gender: Optional[str],
+    first_name: Optional[str],
+    last_name: Optional[str],
+    sort_by_date: bool,
+    distance: Optional[float],
+    base_lat: Optional[float],
+    base_lon: Optional[float],
+    limit: int,
+    position,
+    q: Optional[str],
+):
+    """Страница /list и курсор следующей страницы."""
+
+    def sort_key(p):
+        return p.created_at, p.id
+
+    # Сортировка по дате: sort_by_date — сначала новые
+    if q is not None:
+        # Результаты поиска упорядочены по релевантности, следующей страницы нет
+        page = await ParticipantCRUD.search_participants(
+            db, q, limit, gender, first_name, last_name
+        )
+        cursor_next = None
+    elif distance:
         participants = await ParticipantCRUD.get_nearby_participants(
             db, base_lat, base_lon, distance, gender, first_name, last_name
         )
+        page, cursor_next = paginate_sorted(
+            participants, sort_key, limit, position, descending=sort_by_date
+        )
     else:
+        # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
         participants = await ParticipantCRUD.get_participants(
-            db, gender, first_name, last_name
+            db,
+            gender,
+            first_name,
+            last_name,
+            newest_first=sort_by_date,
+            limit=limit + 1,
+            cursor=position,
         )
+        page, cursor_next = next_cursor(participants, limit, sort_key)
+    return page, cursor_next
 
-    # Сортировка по дате
-    if sort_by_date:
-        participants.sort(key=lambda x: x.created_at, reverse=True)
-    else:
-        participants.sort(key=lambda x: x.created_at)
 
-    # Добавление URL для аватара и координат
-    participants_responses = [
-        ParticipantResponse.from_orm_with_avatar(
-            p, avatar_url=f"{settings.BASE_URL}/api/clients/avatar/{p.id}"
+@router.get(
+    "/export",
+    description="Выгрузка всех участников потоком в формате NDJSON (одна JSON-запись на строку)",
+)
+async def export_participants(
+    request: Request,
+    gender: Optional[str] = Query(None, description="Фильтр по полу"),
+    first_name: Optional[str] = Query(None, description="Фильтр по имени"),
+    last_name: Optional[str] = Query(None, description="Фильтр по фамилии"),
+    sort_by_date: Optional[bool] = Query(False, description="Сортировка по дате"),
+):
+    """Эндпоинт выгрузки участников: строки читаются и отправляются пачками, не накапливаясь в памяти."""
+
+    async def generate():
+        # Сессия открывается в генераторе: зависимости закрываются до отправки тела
+        async with read_session(request) as db:
+            async for rows in ParticipantCRUD.stream_participants(
+                db,
+                gender,
+                first_name,
+                last_name,
+                newest_first=sort_by_date,
+                batch_size=settings.EXPORT_BATCH_SIZE,
+            ):
+                yield b"".join(
+                    orjson.dumps(
+                        participant_payload(
+                            row,
+                            avatar_url=f"{settings.BASE_URL}/api/clients/avatar/{row.id}",
+                        ),
+                        option=orjson.OPT_APPEND_NEWLINE,
+                    )
+                    for row in rows
+                )
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get(
+    "/cache/stats",
+    description="Счетчики кэша поиска участников по расстоянию",
+    include_in_schema=False,
+)
+async def get_cache_stats():
+    """Эндпоинт со статистикой попаданий, промахов и вытеснений кэша."""
+    caches = (nearby_cache, avatar_key_cache, list_response_cache)
+    stats = {cache.name: cache.stats() for cache in caches if cache is not None}
+    stats["change_versions"] = change_versions.stats()
+    stats["geocoding"] = geocoding_service.stats()
+    stats["like_quota"] = like_quota.stats()
+    stats["discover"] = discover_engine.stats()
+    stats["jobs"] = job_queue.stats()
+    return stats
+
+
+@router.get(
+    "/image-worker/stats",
+    description="Статистика пула обработки изображений",
+    include_in_schema=False,
+)
+async def get_image_worker_stats():
+    """Эндпоинт со временем ожидания в очереди и временем обработки аватаров."""
+    return image_worker_pool.stats()
+
+
+@router.post(
+    "/import",
+    description="Массовый импорт участников из NDJSON/CSV-файла",
+    include_in_schema=False,
+)
+async def import_participants_file(
+    file: UploadFile = File(..., description="Файл NDJSON или CSV с участниками"),
+    avatar_dir: Optional[str] = Form(
+        None, description="Подкаталог IMPORT_AVATAR_ROOT с файлами аватаров"
+    ),
+    file_format: Optional[str] = Form(
+        None, pattern="^(ndjson|csv)$", description="Формат файла"
+    ),
+    batch_size: Optional[int] = Form(None, ge=1, description="Размер пакета вставки"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """Эндпоинт импорта: файл сохраняется во временный файл и импортируется пакетами."""
+    if not settings.IMPORT_ADMIN_TOKEN or not secrets.compare_digest(
+        x_admin_token or "", settings.IMPORT_ADMIN_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Доступ запрещен"
+        )
+
+    avatar_root = os.path.abspath(settings.IMPORT_AVATAR_ROOT)
+    avatars = os.path.abspath(os.path.join(avatar_root, avatar_dir or ""))
+    if os.path.commonpath([avatars, avatar_root]) != avatar_root:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Недопустимый каталог аватаров",
         )
-        for p in participants
-    ]
 
-    return participants_responses
+    suffix = os.path.splitext(file.filename or "")[1]
+    fd, path = tempfile.mkstemp(prefix="import-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            await run_in_threadpool(shutil.copyfileobj, file.file, tmp)
+        return await import_participants(
+            path, avatar_dir=avatars, batch_size=batch_size, file_format=file_format
+        )
+    finally:
+        os.remove(path)
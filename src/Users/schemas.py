@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Optional, List
 from enum import Enum
 from datetime import datetime
 
@@ -28,25 +28,86 @@ class ParticipantResponse(ParticipantBase):
     latitude: Optional[str] = Field(None, description="Широта участника")
     longitude: Optional[str] = Field(None, description="Долгота участника")
     city: Optional[str] = Field(None, description="Город участника")
+    avatar_status: str = Field(
+        "ready", description="Готовность аватара: pending, ready или failed"
+    )
+    location_status: str = Field(
+        "ready", description="Готовность координат: pending, ready или failed"
+    )
 
     class Config:
         from_attributes = True
 
     @classmethod
     def from_orm_with_avatar(cls, participant, avatar_url: Optional[str] = None):
-        return cls(
-            id=participant.id,
-            gender=participant.gender,
-            first_name=participant.first_name,
-            last_name=participant.last_name,
-            email=participant.email,
-            is_active=participant.is_active,
-            avatar_url=avatar_url,
-            created_at=participant.created_at,
-            latitude=participant.latitude,
-            longitude=participant.longitude,
-            city=participant.city,
-        )
+        """
+        Данные из БД проверены при записи, поэтому модель собирается без повторной
+        валидации. participant — ORM-объект или строка с колонками ответа.
+        """
+        fields = participant_payload(participant, avatar_url)
+        fields["gender"] = _GENDERS.get(fields["gender"], fields["gender"])
+        return cls.model_construct(**fields)
+
+
+_GENDERS = GenderEnum._value2member_map_
+
+
+def participant_payload(participant, avatar_url: Optional[str] = None) -> dict:
+    """
+    Поля ParticipantResponse словарем для сериализации без модели (ORJSONResponse,
+    выгрузка). participant — ORM-объект или строка с колонками ответа.
+    """
+    return {
+        "gender": participant.gender,
+        "first_name": participant.first_name,
+        "last_name": participant.last_name,
+        "email": participant.email,
+        "id": participant.id,
+        "is_active": participant.is_active,
+        "avatar_url": avatar_url,
+        "created_at": participant.created_at,
+        "latitude": participant.latitude,
+        "longitude": participant.longitude,
+        "city": participant.city,
+        "avatar_status": participant.avatar_status,
+        "location_status": participant.location_status,
+    }
+
+
+class ParticipantListResponse(BaseModel):
+    items: List[ParticipantResponse] = Field(..., description="Участники на странице")
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы, если она есть"
+    )
+
+
+class DiscoverResponse(BaseModel):
+    items: List[ParticipantResponse] = Field(..., description="Кандидаты для оценки")
+    exhausted: bool = Field(
+        ...,
+        description="Подходящих кандидатов больше нет, пока не зарегистрируются новые",
+    )
+
+
+class ConnectionListResponse(BaseModel):
+    items: List[ParticipantResponse] = Field(..., description="Участники на странице")
+    total: int = Field(..., description="Общее количество записей")
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы, если она есть"
+    )
+
+
+class ParticipantStatusResponse(BaseModel):
+    id: int = Field(..., description="Идентификатор участника")
+    avatar_status: str = Field(
+        ..., description="Готовность аватара: pending, ready или failed"
+    )
+    location_status: str = Field(
+        ..., description="Готовность координат: pending, ready или failed"
+    )
+    ready: bool = Field(
+        ..., description="Фоновая обработка после регистрации завершена"
+    )
 
 
 class MatchRequest(BaseModel):
@@ -0,0 +1,76 @@
+"""
+Полнотекстовый поиск участников по имени и фамилии.
+
+PostgreSQL: GIN-индекс pg_trgm по выражению first_name || ' ' || last_name,
+поиск по подстроке (ILIKE) и по похожести (оператор %) с ранжированием similarity().
+SQLite: таблица FTS5 participants_fts с внешним содержимым, синхронизируемая
+триггерами; поиск по префиксам слов с ранжированием bm25().
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import DDL, event, literal_column
+from sqlalchemy.sql.elements import ColumnElement
+
+SEARCH_TABLE = "participants_fts"
+TRGM_INDEX = "ix_participants_name_trgm"
+
+SQLITE_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "first_name, last_name, content='participants', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS participants_fts_insert AFTER INSERT ON participants BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name) "
+    "VALUES (new.id, new.first_name, new.last_name); END",
+    f"CREATE TRIGGER IF NOT EXISTS participants_fts_delete AFTER DELETE ON participants BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name); END",
+    "CREATE TRIGGER IF NOT EXISTS participants_fts_update "
+    "AFTER UPDATE OF first_name, last_name ON participants BEGIN "
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, first_name, last_name) "
+    "VALUES ('delete', old.id, old.first_name, old.last_name); "
+    f"INSERT INTO {SEARCH_TABLE}(rowid, first_name, last_name) "
+    "VALUES (new.id, new.first_name, new.last_name); END",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+]
+
+POSTGRES_SEARCH_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {TRGM_INDEX} ON participants "
+    "USING gin ((first_name || ' ' || last_name) gin_trgm_ops)",
+]
+
+
+def attach_search_ddl(table) -> None:
+    """Создает объекты поиска вместе с таблицей при metadata.create_all."""
+    for statement in SQLITE_SEARCH_DDL:
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    for statement in POSTGRES_SEARCH_DDL:
+        event.listen(
+            table, "after_create", DDL(statement).execute_if(dialect="postgresql")
+        )
+
+
+def is_search_object(name: Optional[str]) -> bool:
+    """Объекты поиска создаются вручную и не описаны в моделях (для Alembic)."""
+    return bool(name) and (name.startswith(SEARCH_TABLE) or name == TRGM_INDEX)
+
+
+def search_terms(query: str) -> List[str]:
+    """Слова поискового запроса без знаков препинания."""
+    return re.findall(r"\w+", query)
+
+
+def fts5_query(query: str) -> Optional[str]:
+    """Запрос FTS5: все слова как префиксы, например "ив"* "пет"*."""
+    terms = search_terms(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def full_name(first_name, last_name) -> ColumnElement:
+    """Выражение, совпадающее с выражением триграммного индекса."""
+    # Разделитель литералом, а не параметром, иначе PostgreSQL не применит индекс
+    return first_name.op("||")(literal_column("' '")).op("||")(last_name)
@@ -0,0 +1,91 @@
+"""
+Фоновая обработка после регистрации участника: аватар и геокодирование города.
+
+Регистрация сохраняет исходный файл аватара в хранилище и ставит задачи в очередь
+в той же транзакции, что и участника; поля avatar_status и location_status
+показывают клиенту, готовы ли аватар и координаты.
+"""
+
+import asyncio
+
+from config import settings
+from db import async_session
+from src.utils.blob_store import get_blob_store
+from src.utils.geolocation import geocoding_service
+from src.utils.image_processing import process_avatar
+from src.utils.jobs import job_queue
+from .crud import ParticipantCRUD
+from .discover import discover_engine
+
+AVATAR_JOB = "process_avatar"
+GEOCODE_JOB = "geocode_city"
+
+STATUS_PENDING = "pending"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+async def process_avatar_job(payload: dict) -> None:
+    """Водяной знак и производные аватара из исходного файла upload_key."""
+    store = get_blob_store()
+    content = await asyncio.to_thread(store.get, payload["upload_key"])
+    if content is None:
+        raise FileNotFoundError(
+            f"Исходный файл аватара не найден: {payload['upload_key']}"
+        )
+    processed = await process_avatar(content)
+    avatar_key = await asyncio.to_thread(store.put, processed.original)
+    avatar_variants = await asyncio.to_thread(store.put_many, processed.variants)
+    # Исходный файл остается в хранилище: по нему можно пересобрать производные
+    async with async_session() as db:
+        await ParticipantCRUD.update_avatar(
+            db, payload["participant_id"], avatar_key, avatar_variants
+        )
+
+
+async def geocode_job(payload: dict) -> None:
+    """Координаты по городу; ошибки провайдера приводят к повторной попытке."""
+    coordinates = await geocoding_service.resolve(payload["city"])
+    async with async_session() as db:
+        if coordinates is None:
+            # Город не найден: координат нет, как и при синхронной регистрации
+            await ParticipantCRUD.update_location(db, payload["participant_id"])
+        else:
+            latitude, longitude, display_city = coordinates
+            await ParticipantCRUD.update_location(
+                db,
+                payload["participant_id"],
+                str(latitude),
+                str(longitude),
+                display_city,
+            )
+    discover_engine.on_location_resolved()
+
+
+async def _avatar_failed(payload: dict) -> None:
+    async with async_session() as db:
+        await ParticipantCRUD.set_processing_status(
+            db, payload["participant_id"], avatar_status=STATUS_FAILED
+        )
+
+
+async def _geocode_failed(payload: dict) -> None:
+    async with async_session() as db:
+        await ParticipantCRUD.set_processing_status(
+            db, payload["participant_id"], location_status=STATUS_FAILED
+        )
+    discover_engine.on_location_resolved()
+
+
+job_queue.register(
+    AVATAR_JOB,
+    process_avatar_job,
+    concurrency=settings.JOB_AVATAR_CONCURRENCY,
+    on_failure=_avatar_failed,
+)
+job_queue.register(
+    GEOCODE_JOB,
+    geocode_job,
+    concurrency=settings.JOB_GEOCODE_CONCURRENCY,
+    on_failure=_geocode_failed,
+)
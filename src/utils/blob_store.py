@@ -0,0 +1,99 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from config import settings
+
+
+class BlobStore(ABC):
+    """Хранилище бинарных объектов, адресуемых по хэшу содержимого."""
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        """Ключ объекта — SHA-256 содержимого."""
+        return hashlib.sha256(data).hexdigest()
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """Сохраняет объект и возвращает его ключ. Повторная запись того же содержимого не дублируется."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Возвращает содержимое объекта или None, если его нет."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Удаляет объект, если он существует."""
+
+    def path(self, key: str) -> Optional[str]:
+        """Путь к файлу объекта на локальном диске, если бэкенд его предоставляет."""
+        return None
+
+    def put_many(self, blobs: Dict[str, bytes]) -> Dict[str, str]:
+        """Сохраняет несколько объектов и возвращает их ключи под теми же именами."""
+        return {name: self.put(data) for name, data in blobs.items()}
+
+
+class LocalBlobStore(BlobStore):
+    """Хранилище на локальной файловой системе с шардированием по префиксу хэша: ab/cd/abcd..."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path(self, key: str) -> Optional[str]:
+        if len(key) < 4 or not key.isalnum():
+            return None
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data: bytes) -> str:
+        key = self.key_for(data)
+        target = self.path(key)
+        if os.path.exists(target):
+            return key
+
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        # Пишем во временный файл и атомарно переименовываем
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def get(self, key: str) -> Optional[bytes]:
+        target = self.path(key)
+        if target is None or not os.path.exists(target):
+            return None
+        with open(target, "rb") as f:
+            return f.read()
+
+    def delete(self, key: str) -> None:
+        target = self.path(key)
+        if target is not None and os.path.exists(target):
+            os.remove(target)
+
+
+_BACKENDS = {
+    "local": lambda: LocalBlobStore(settings.BLOB_STORE_PATH),
+}
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Возвращает хранилище, выбранное настройкой BLOB_STORE_BACKEND."""
+    global _blob_store
+    if _blob_store is None:
+        try:
+            _blob_store = _BACKENDS[settings.BLOB_STORE_BACKEND]()
+        except KeyError:
+            raise ValueError(
+                f"Неизвестный бэкенд хранилища: {settings.BLOB_STORE_BACKEND}"
+            )
+    return _blob_store
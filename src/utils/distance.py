@@ -1,7 +1,21 @@
-from math import radians, sin, cos, sqrt, atan2
+from math import radians, degrees, sin, cos, sqrt, atan2, asin, floor
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    import numpy as np
+
+T = TypeVar("T")
 
 EARTH_RADIUS_KM = 6371.01  # Средний радиус Земли в километрах
 
+# Размер ячейки географической сетки в градусах (~55 км по широте)
+GEO_CELL_SIZE_DEG = 0.5
+GEO_CELL_COLUMNS = int(360 / GEO_CELL_SIZE_DEG)
+GEO_CELL_ROWS = int(180 / GEO_CELL_SIZE_DEG)
+
+# Максимальное число ячеек в префильтре; для больших радиусов хватает bounding box
+MAX_PREFILTER_CELLS = 64
+
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -17,3 +31,134 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     c = 2 * atan2(sqrt(a), sqrt(1 - a))
 
     return EARTH_RADIUS_KM * c
+
+
+def calculate_distances(
+    lat: float, lon: float, lats: "np.ndarray", lons: "np.ndarray"
+) -> "np.ndarray":
+    """
+    Векторизованный Haversine: расстояния в километрах от точки (lat, lon)
+    до N точек, заданных массивами широт и долгот float64.
+    """
+    # numpy импортируется при первом вызове: он нужен только для поиска по расстоянию
+    import numpy as np
+
+    lat_r, lon_r = radians(lat), radians(lon)
+    lats_r = np.radians(np.asarray(lats, dtype=np.float64))
+    lons_r = np.radians(np.asarray(lons, dtype=np.float64))
+
+    # Промежуточные результаты считаются на месте, без лишних аллокаций
+    a = np.sin((lats_r - lat_r) * 0.5)
+    np.square(a, out=a)
+    b = np.sin((lons_r - lon_r) * 0.5)
+    np.square(b, out=b)
+    np.cos(lats_r, out=lats_r)
+    b *= lats_r
+    b *= cos(lat_r)
+    a += b
+    np.clip(a, 0.0, 1.0, out=a)
+    np.sqrt(a, out=a)
+    np.arcsin(a, out=a)
+    a *= 2 * EARTH_RADIUS_KM
+    return a
+
+
+def within_radius_mask(
+    lat: float, lon: float, lats: "np.ndarray", lons: "np.ndarray", max_distance: float
+) -> "np.ndarray":
+    """Булева маска точек, находящихся не дальше max_distance километров."""
+    return calculate_distances(lat, lon, lats, lons) <= max_distance
+
+
+def filter_within_radius(
+    items: Sequence[T],
+    lats: "np.ndarray",
+    lons: "np.ndarray",
+    lat: float,
+    lon: float,
+    max_distance: float,
+) -> List[T]:
+    """Оставляет элементы items, координаты которых лежат в пределах max_distance километров."""
+    import numpy as np
+
+    if len(items) == 0:
+        return []
+    mask = within_radius_mask(lat, lon, lats, lons, max_distance)
+    return [items[i] for i in np.flatnonzero(mask)]
+
+
+def parse_coordinate(value: Optional[str]) -> Optional[float]:
+    """Преобразует строковую координату в число, возвращая None для пустых и некорректных значений."""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _cell_row(lat: float) -> int:
+    return min(int(floor((lat + 90.0) / GEO_CELL_SIZE_DEG)), GEO_CELL_ROWS - 1)
+
+
+def _cell_col(lon: float) -> int:
+    return int(floor((lon + 180.0) / GEO_CELL_SIZE_DEG)) % GEO_CELL_COLUMNS
+
+
+def geo_cell(lat: Optional[float], lon: Optional[float]) -> Optional[int]:
+    """Возвращает номер ячейки сетки GEO_CELL_SIZE_DEG x GEO_CELL_SIZE_DEG для точки."""
+    if lat is None or lon is None:
+        return None
+    return _cell_row(lat) * GEO_CELL_COLUMNS + _cell_col(lon)
+
+
+def bounding_box(
+    lat: float, lon: float, distance_km: float
+) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    Вычисляет прямоугольник, гарантированно содержащий окружность радиуса distance_km.
+    Возвращает (min_lat, max_lat, [(min_lon, max_lon), ...]); диапазонов долгот два,
+    если прямоугольник пересекает 180-й меридиан.
+    """
+    angular = distance_km / EARTH_RADIUS_KM
+    lat_r = radians(lat)
+    min_lat_r = lat_r - angular
+    max_lat_r = lat_r + angular
+
+    # Окружность захватывает полюс — подходят все долготы
+    if min_lat_r <= -radians(90) or max_lat_r >= radians(90):
+        return (
+            max(degrees(min_lat_r), -90.0),
+            min(degrees(max_lat_r), 90.0),
+            [(-180.0, 180.0)],
+        )
+
+    delta_lon = degrees(asin(min(sin(angular) / cos(lat_r), 1.0)))
+    min_lat, max_lat = degrees(min_lat_r), degrees(max_lat_r)
+    min_lon, max_lon = lon - delta_lon, lon + delta_lon
+
+    if delta_lon >= 180.0:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    if min_lon < -180.0:
+        return min_lat, max_lat, [(min_lon + 360.0, 180.0), (-180.0, max_lon)]
+    if max_lon > 180.0:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360.0)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def cells_for_box(
+    min_lat: float, max_lat: float, lon_ranges: List[Tuple[float, float]]
+) -> Optional[List[int]]:
+    """
+    Возвращает список ячеек, покрывающих прямоугольник, или None,
+    если ячеек больше MAX_PREFILTER_CELLS и префильтр по ним бесполезен.
+    """
+    rows = range(_cell_row(min_lat), _cell_row(max_lat) + 1)
+    cols = set()
+    for min_lon, max_lon in lon_ranges:
+        first, last = _cell_col(min_lon), _cell_col(min(max_lon, 180.0 - 1e-9))
+        cols.update(range(first, last + 1))
+
+    if len(rows) * len(cols) > MAX_PREFILTER_CELLS:
+        return None
+    return sorted(row * GEO_CELL_COLUMNS + col for row in rows for col in cols)
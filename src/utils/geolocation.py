@@ -1,23 +1,277 @@
-import httpx
-from typing import Optional, Tuple
+import asyncio
+import csv
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+from config import settings
+from src.utils.cache import AsyncTTLCache
+from src.utils.logging import AppLogger
+from src.utils.metrics import geocoding_duration
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = AppLogger().get_logger()
+
+
+class GeocodingError(Exception):
+    """Провайдер геокодирования недоступен или вернул ошибку."""
+
+
+# Ошибки провайдера: недоступность сервиса или неожиданный формат ответа
+GEOCODING_ERRORS = (GeocodingError, ValueError, KeyError)
+
+
+class GeoResult(NamedTuple):
+    latitude: float
+    longitude: float
+    display_name: str
+
+
+def normalize_city(city: str) -> str:
+    """Нормализует название города для ключа кэша: регистр и лишние пробелы не важны."""
+    return " ".join(city.split()).casefold()
+
+
+class GeocodingProvider(ABC):
+    """Источник координат по названию города."""
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def lookup(self, city: str) -> Optional[GeoResult]:
+        """Возвращает координаты города или None, если город не найден."""
+
+
+class NominatimProvider(GeocodingProvider):
+    """Геокодирование через Nominatim API с долгоживущим пулом соединений."""
+
+    def __init__(self, url: str, timeout: float, user_agent: str):
+        self.url = url
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    async def start(self) -> None:
+        # httpx импортируется только для этого провайдера
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": self.user_agent},
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+            )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def lookup(self, city: str) -> Optional[GeoResult]:
+        import httpx
+
+        await self.start()
+        params = {
+            "q": city,
+            "format": "json",
+            "limit": 1,
+        }
+        try:
+            response = await self._client.get(self.url, params=params)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            raise GeocodingError(str(e) or type(e).__name__) from e
+        data = response.json()
+        if not data:
+            return None
+        # Название города из API или указанное значение
+        return GeoResult(
+            float(data[0]["lat"]),
+            float(data[0]["lon"]),
+            data[0].get("display_name", city),
+        )
+
+
+class GazetteerProvider(GeocodingProvider):
+    """
+    Офлайн-справочник городов из CSV-файла с колонками name, latitude, longitude
+    и необязательной display_name — для тестов и изолированных окружений.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._places: Optional[Dict[str, GeoResult]] = None
+
+    def _load(self) -> Dict[str, GeoResult]:
+        places = {}
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                places[normalize_city(row["name"])] = GeoResult(
+                    float(row["latitude"]),
+                    float(row["longitude"]),
+                    row.get("display_name") or row["name"],
+                )
+        return places
+
+    async def lookup(self, city: str) -> Optional[GeoResult]:
+        if self._places is None:
+            self._places = await asyncio.to_thread(self._load)
+        return self._places.get(normalize_city(city))
+
+
+class GeocodeCache:
+    """
+    Персистентный кэш геокодирования в отдельном файле SQLite.
+    Хранит и отрицательные ответы (город не найден) с собственным TTL.
+    """
+
+    def __init__(self, path: str, ttl: float, negative_ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        # Соединение используется из разных потоков пула, доступ сериализуется
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_cache ("
+                "city TEXT PRIMARY KEY, latitude REAL, longitude REAL, "
+                "display_name TEXT, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get(self, city: str) -> Tuple[bool, Optional[GeoResult]]:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT latitude, longitude, display_name, expires_at "
+                    "FROM geocode_cache WHERE city = ?",
+                    (city,),
+                )
+                .fetchone()
+            )
+        if row is None or row[3] < time.time():
+            return False, None
+        if row[0] is None:
+            return True, None
+        return True, GeoResult(row[0], row[1], row[2])
+
+    def _set(self, city: str, result: Optional[GeoResult]) -> None:
+        ttl = self.ttl if result is not None else self.negative_ttl
+        latitude, longitude, display_name = result or (None, None, None)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?, ?, ?)",
+                    (city, latitude, longitude, display_name, time.time() + ttl),
+                )
+
+    async def get(self, city: str) -> Tuple[bool, Optional[GeoResult]]:
+        """Возвращает (найдено ли в кэше, результат)."""
+        return await asyncio.to_thread(self._get, city)
+
+    async def set(self, city: str, result: Optional[GeoResult]) -> None:
+        await asyncio.to_thread(self._set, city, result)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class GeocodingService:
+    """
+    Геокодирование с персистентным кэшем и объединением одновременных запросов
+    одного города в один запрос к провайдеру.
+    """
+
+    def __init__(self, provider: GeocodingProvider, cache: Optional[GeocodeCache]):
+        self.provider = provider
+        self.cache = cache
+        # Кэш в памяти объединяет одновременные запросы (single-flight)
+        self._memory = AsyncTTLCache("geocoding", maxsize=10_000, ttl=60 * 60)
+
+    async def start(self) -> None:
+        await self.provider.start()
+
+    async def close(self) -> None:
+        await self.provider.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    async def _resolve(self, city: str) -> Optional[GeoResult]:
+        if self.cache is not None:
+            found, result = await self.cache.get(city)
+            if found:
+                return result
+
+        result = await self.provider.lookup(city)
+        if self.cache is not None:
+            await self.cache.set(city, result)
+        return result
+
+    async def resolve(self, city: str) -> Optional[GeoResult]:
+        """Координаты и название города; ошибки провайдера пробрасываются и не кэшируются."""
+        key = normalize_city(city)
+        if not key:
+            return None
+        with geocoding_duration.time():
+            return await self._memory.get_or_load(key, lambda: self._resolve(key))
+
+    async def get_coordinates(self, city: str) -> Optional[GeoResult]:
+        """Координаты и название города; при ошибке провайдера — None."""
+        try:
+            return await self.resolve(city)
+        except GEOCODING_ERRORS as e:
+            logger.warning("Ошибка геокодирования города %s: %s", city, e)
+            return None
+
+    def stats(self) -> Dict[str, int]:
+        return self._memory.stats()
+
+
+def _create_provider() -> GeocodingProvider:
+    if settings.GEOCODER_PROVIDER == "nominatim":
+        return NominatimProvider(
+            settings.NOMINATIM_URL,
+            settings.GEOCODER_TIMEOUT,
+            settings.GEOCODER_USER_AGENT,
+        )
+    if settings.GEOCODER_PROVIDER == "gazetteer":
+        return GazetteerProvider(settings.GEOCODER_GAZETTEER_PATH)
+    raise ValueError(
+        f"Неизвестный провайдер геокодирования: {settings.GEOCODER_PROVIDER}"
+    )
+
+
+geocoding_service = GeocodingService(
+    _create_provider(),
+    GeocodeCache(
+        settings.GEOCODE_CACHE_PATH,
+        settings.GEOCODE_CACHE_TTL,
+        settings.GEOCODE_NEGATIVE_CACHE_TTL,
+    )
+    if settings.GEOCODE_CACHE_PATH
+    else None,
+)
 
 
 async def get_coordinates_from_city(city: str) -> Optional[Tuple[float, float, str]]:
-    """Получение координат и названия города по названию с использованием Nominatim API."""
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": city,
-        "format": "json",
-        "limit": 1,
-    }
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, params=params)
-        if response.status_code == 200 and response.json():
-            data = response.json()[0]
-            latitude = float(data["lat"])
-            longitude = float(data["lon"])
-            display_name = data.get(
-                "display_name", city
-            )  # Название города из API или указанное значение
-            return latitude, longitude, display_name
-    return None
+    """Получение координат и названия города по названию через сервис геокодирования."""
+    return await geocoding_service.get_coordinates(city)
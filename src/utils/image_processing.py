@@ -1,25 +1,273 @@
-from PIL import Image
 from io import BytesIO
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
 import asyncio
+import os
+import time
 
-WATERMARK_PATH = "src/utils/watermark.png"
+from config import settings
+from src.utils.metrics import image_processing_duration
 
+if TYPE_CHECKING:
+    from PIL import Image
 
-async def add_watermark(avatar_content: BytesIO) -> BytesIO:
-    """Асинхронное добавление водяного знака к изображению."""
-    await asyncio.sleep(0)  # Помощь в освобождении текущего потока выполнения
-    avatar = Image.open(avatar_content).convert("RGBA")
-    watermark = Image.open(WATERMARK_PATH).convert("RGBA")
+# Pillow импортируется при первой обработке изображения (в воркере или при проверке загрузки)
+
+WATERMARK_PATH = os.path.join(os.path.dirname(__file__), "watermark.png")
+
+# Форматы производных изображений: имя -> (формат Pillow, MIME-тип, параметры кодирования)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": (
+        "JPEG",
+        "image/jpeg",
+        {"quality": 85, "optimize": True, "progressive": True},
+    ),
+}
+ORIGINAL_SIZE = "original"
+
+
+class ProcessedAvatar(NamedTuple):
+    """Аватар с водяным знаком (PNG) и его производные, ключ производной — "<размер>.<формат>"."""
+
+    original: bytes
+    variants: Dict[str, bytes]
+
+
+def variant_name(size, fmt: str) -> str:
+    return f"{size}.{fmt}"
+
+
+def choose_avatar_variant(
+    variants: Dict[str, str], size: Optional[int], accept: str
+) -> Optional[Tuple[str, str]]:
+    """
+    Выбирает производную аватара по запрошенному размеру и заголовку Accept.
+    Возвращает (имя производной, MIME-тип) или None, если подходит только исходный PNG.
+    """
+    accept = accept.lower()
+    accepts_any = not accept or "*/*" in accept or "image/*" in accept
+    sizes = sorted(
+        int(name.split(".")[0]) for name in variants if name.split(".")[0].isdigit()
+    )
+    # Наименьший сохраненный размер, не меньше запрошенного
+    chosen_size = ORIGINAL_SIZE
+    if size is not None:
+        chosen_size = next((s for s in sizes if s >= size), ORIGINAL_SIZE)
+
+    for fmt, (_, media_type, _) in DERIVATIVE_FORMATS.items():
+        name = variant_name(chosen_size, fmt)
+        if name in variants and (media_type in accept or accepts_any):
+            return name, media_type
+    return None
+
+
+class ImageWorkerOverloaded(Exception):
+    """Очередь обработки изображений переполнена."""
+
+
+@lru_cache(maxsize=1)
+def _load_watermark() -> "Image.Image":
+    """Водяной знак декодируется один раз на процесс-воркер."""
+    from PIL import Image
+
+    return Image.open(WATERMARK_PATH).convert("RGBA")
+
+
+@lru_cache(maxsize=64)
+def _resized_watermark(size: Tuple[int, int]) -> "Image.Image":
+    """Уменьшенные копии водяного знака кэшируются по целевому размеру."""
+    return _load_watermark().resize(size)
+
+
+def _apply_watermark(avatar_content: bytes) -> "Image.Image":
+    from PIL import Image
+
+    avatar = Image.open(BytesIO(avatar_content)).convert("RGBA")
 
     # Изменение размера водяного знака под изображение
-    watermark = watermark.resize((avatar.width // 4, avatar.height // 4))
+    watermark = _resized_watermark((avatar.width // 4, avatar.height // 4))
     avatar.paste(
         watermark,
         (avatar.width - watermark.width, avatar.height - watermark.height),
         watermark,
     )
+    return avatar
 
+
+def _encode(image: "Image.Image", fmt: str) -> bytes:
+    from PIL import Image
+
+    pil_format, _, options = DERIVATIVE_FORMATS[fmt]
+    if pil_format == "JPEG":
+        # JPEG не поддерживает прозрачность: подкладываем белый фон
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
     result = BytesIO()
-    avatar.save(result, format="PNG")
-    result.seek(0)
-    return result
+    image.save(result, format=pil_format, **options)
+    return result.getvalue()
+
+
+def _process_avatar_sync(
+    avatar_content: bytes, sizes: List[int], formats: List[str]
+) -> ProcessedAvatar:
+    """Водяной знак и все производные за одно декодирование (выполняется в воркере)."""
+    from PIL import Image
+
+    avatar = _apply_watermark(avatar_content)
+    original = BytesIO()
+    avatar.save(original, format="PNG")
+
+    variants = {}
+    for size in [ORIGINAL_SIZE, *sorted(sizes)]:
+        if size == ORIGINAL_SIZE:
+            image = avatar
+        else:
+            image = avatar.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            variants[variant_name(size, fmt)] = _encode(image, fmt)
+    return ProcessedAvatar(original.getvalue(), variants)
+
+
+def is_valid_image(content: bytes) -> bool:
+    """Быстрая проверка загруженного файла: формат распознается, данные не повреждены."""
+    from PIL import Image
+
+    try:
+        with Image.open(BytesIO(content)) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+
+
+def _warm_worker() -> None:
+    _load_watermark()
+
+
+def _timed_call(func, submitted_at: float, *args) -> Tuple[object, float, float]:
+    """Выполняет задачу и возвращает результат вместе с временем ожидания и обработки."""
+    started_at = time.time()
+    result = func(*args)
+    return result, started_at - submitted_at, time.time() - started_at
+
+
+class ImageWorkerPool:
+    """
+    Пул воркеров для обработки изображений вне event loop.
+    Количество задач в очереди ограничено: при переполнении запрос ждет
+    IMAGE_QUEUE_TIMEOUT секунд, после чего получает ImageWorkerOverloaded.
+    """
+
+    def __init__(
+        self,
+        mode: str = "process",
+        workers: Optional[int] = None,
+        max_pending: int = 32,
+        queue_timeout: float = 5.0,
+    ):
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.processing_total = 0.0
+        self.processing_max = 0.0
+
+    def start(self) -> None:
+        if self._executor is not None:
+            return
+        if self.mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif self.mode == "thread":
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="image-worker"
+            )
+        else:
+            raise ValueError(f"Неизвестный режим пула изображений: {self.mode}")
+        self._slots = asyncio.Semaphore(self.max_pending)
+
+    async def warm_up(self) -> None:
+        """
+        Запускает все воркеры заранее: процессы создаются, импортируют Pillow
+        и декодируют водяной знак до первого запроса.
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, _warm_worker)
+                for _ in range(self.workers)
+            )
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._slots = None
+
+    async def run(self, func, *args):
+        """Выполняет func(*args) в пуле с учетом ограничения очереди."""
+        self.start()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ImageWorkerOverloaded("Очередь обработки изображений переполнена")
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, queue_wait, processing = await loop.run_in_executor(
+                self._executor, _timed_call, func, time.time(), *args
+            )
+        finally:
+            self._slots.release()
+
+        self.completed += 1
+        self.queue_wait_total += queue_wait
+        self.queue_wait_max = max(self.queue_wait_max, queue_wait)
+        self.processing_total += processing
+        self.processing_max = max(self.processing_max, processing)
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Счетчики пула: ожидание в очереди и время обработки в секундах."""
+        completed = self.completed or 1
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / completed,
+            "queue_wait_max": self.queue_wait_max,
+            "processing_avg": self.processing_total / completed,
+            "processing_max": self.processing_max,
+        }
+
+
+image_worker_pool = ImageWorkerPool(
+    mode=settings.IMAGE_WORKER_MODE,
+    workers=settings.IMAGE_WORKERS,
+    max_pending=settings.IMAGE_MAX_PENDING,
+    queue_timeout=settings.IMAGE_QUEUE_TIMEOUT,
+)
+
+
+async def process_avatar(avatar_content: bytes) -> ProcessedAvatar:
+    """Водяной знак и производные размеры/форматы аватара из настроек AVATAR_SIZES и AVATAR_FORMATS."""
+    with image_processing_duration.time(operation="process_avatar"):
+        return await image_worker_pool.run(
+            _process_avatar_sync,
+            avatar_content,
+            settings.AVATAR_SIZES,
+            settings.AVATAR_FORMATS,
+        )
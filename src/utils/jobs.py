@@ -0,0 +1,354 @@
+"""
+Очередь фоновых задач, хранящаяся в таблице jobs.
+
+Задачи добавляются в той же транзакции, что и данные, к которым они относятся,
+поэтому переживают перезапуск процесса. Воркеры каждого типа задач забирают
+задачи атомарным UPDATE ... RETURNING с арендой (locked_until): задача, чей
+воркер упал, снова становится доступной после истечения аренды. Неудачные
+попытки повторяются с экспоненциальной задержкой до max_attempts; выполненные
+задачи удаляются, проваленные остаются в таблице со статусом failed.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import (
+    JSON,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+    and_,
+    delete,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from db import Base, async_session
+from src.utils.logging import AppLogger
+
+logger = AppLogger().get_logger()
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_FAILED = "failed"
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(32), nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String(16), nullable=False, default=JOB_PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    # Время, не раньше которого задачу можно выполнять (задержка повтора)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Аренда задачи воркером; по истечении задача снова доступна
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_jobs_kind_status_run_at", "kind", "status", "run_at"),)
+
+
+class JobType:
+    """Обработчик типа задач и его ограничение параллелизма."""
+
+    def __init__(
+        self,
+        kind: str,
+        handler: JobHandler,
+        concurrency: int,
+        on_failure: Optional[JobHandler] = None,
+    ):
+        self.kind = kind
+        self.handler = handler
+        self.concurrency = concurrency
+        self.on_failure = on_failure
+        self.running: Set[asyncio.Task] = set()
+        self.wake = asyncio.Event()
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def on_done(self, task: asyncio.Task) -> None:
+        self.running.discard(task)
+        self.wake.set()
+
+
+class JobQueue:
+    """Воркеры фоновых задач: по диспетчеру на тип задач, не больше concurrency задач одновременно."""
+
+    def __init__(
+        self,
+        session_factory=async_session,
+        poll_interval: float = 1.0,
+        lease: float = 5 * 60,
+        max_attempts: int = 5,
+        retry_base_delay: float = 2.0,
+        retry_max_delay: float = 10 * 60,
+        shutdown_timeout: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease)
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.shutdown_timeout = shutdown_timeout
+        self._types: Dict[str, JobType] = {}
+        self._dispatchers: List[asyncio.Task] = []
+        self._stopping = False
+        # id задач, взятых этим процессом; при остановке они возвращаются в очередь
+        self._claimed: Set[int] = set()
+
+    def register(
+        self,
+        kind: str,
+        handler: JobHandler,
+        concurrency: int = 1,
+        on_failure: Optional[JobHandler] = None,
+    ) -> None:
+        """
+        Регистрирует обработчик типа задач. on_failure вызывается с payload,
+        когда попытки исчерпаны.
+        """
+        self._types[kind] = JobType(kind, handler, concurrency, on_failure)
+
+    def enqueue(
+        self,
+        db: AsyncSession,
+        kind: str,
+        payload: dict,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """Добавляет задачу в сессию; задача сохраняется при коммите вызывающего кода."""
+        if kind not in self._types:
+            raise ValueError(f"Неизвестный тип задачи: {kind}")
+        job = Job(
+            kind=kind,
+            payload=payload,
+            status=JOB_PENDING,
+            attempts=0,
+            max_attempts=max_attempts or self.max_attempts,
+            run_at=datetime.utcnow(),
+        )
+        db.add(job)
+        return job
+
+    def notify(self, kind: Optional[str] = None) -> None:
+        """Будит диспетчеры после коммита, чтобы не ждать следующего опроса."""
+        for job_type in self._types.values():
+            if kind is None or job_type.kind == kind:
+                job_type.wake.set()
+
+    def retry_delay(self, attempts: int) -> float:
+        """Экспоненциальная задержка со случайным разбросом, чтобы повторы не шли волной."""
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def start(self) -> None:
+        self._stopping = False
+        for job_type in self._types.values():
+            task = asyncio.create_task(self._dispatch(job_type))
+            self._dispatchers.append(task)
+
+    async def close(self) -> None:
+        """Перестает брать задачи, ждет выполняющиеся и возвращает незавершенные в очередь."""
+        # Диспетчеры не отменяются, а завершают текущую выборку: отмена посреди
+        # запроса оставила бы соединение в неопределенном состоянии
+        self._stopping = True
+        self.notify()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers.clear()
+
+        running = [task for t in self._types.values() for task in t.running]
+        if running:
+            _, pending = await asyncio.wait(running, timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if self._claimed:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id.in_(self._claimed))
+                    .where(Job.status == JOB_RUNNING)
+                    .values(
+                        status=JOB_PENDING,
+                        attempts=Job.attempts - 1,
+                        locked_until=None,
+                        run_at=datetime.utcnow(),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            logger.info(
+                "Возвращено в очередь незавершенных задач: %s", len(self._claimed)
+            )
+            self._claimed.clear()
+
+    async def _dispatch(self, job_type: JobType) -> None:
+        while not self._stopping:
+            job_type.wake.clear()
+            free = job_type.concurrency - len(job_type.running)
+            jobs = []
+            if free > 0:
+                try:
+                    jobs = await self._claim(job_type.kind, free)
+                except Exception as e:
+                    logger.error("Ошибка выборки задач %s: %s", job_type.kind, e)
+                for job in jobs:
+                    task = asyncio.create_task(self._run(job_type, job))
+                    job_type.running.add(task)
+                    task.add_done_callback(job_type.on_done)
+            if jobs and len(jobs) == free:
+                # Слоты заняты; следующая выборка — после завершения одной из задач
+                continue
+            try:
+                await asyncio.wait_for(job_type.wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, kind: str, limit: int) -> List[Job]:
+        """Атомарно берет до limit готовых задач: ожидающих или с истекшей арендой."""
+        now = datetime.utcnow()
+        available = (
+            select(Job.id)
+            .where(Job.kind == kind)
+            .where(
+                or_(
+                    and_(Job.status == JOB_PENDING, Job.run_at <= now),
+                    and_(Job.status == JOB_RUNNING, Job.locked_until < now),
+                )
+            )
+            .order_by(Job.run_at)
+            .limit(limit)
+            # В PostgreSQL параллельные воркеры пропускают чужие строки; SQLite сериализует запись
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as db:
+            result = await db.execute(
+                update(Job)
+                .where(Job.id.in_(available))
+                .values(
+                    status=JOB_RUNNING,
+                    attempts=Job.attempts + 1,
+                    locked_until=now + self.lease,
+                )
+                .returning(Job.id, Job.payload, Job.attempts, Job.max_attempts)
+                .execution_options(synchronize_session=False)
+            )
+            jobs = result.all()
+            await db.commit()
+        self._claimed.update(job.id for job in jobs)
+        return jobs
+
+    async def _run(self, job_type: JobType, job) -> None:
+        try:
+            try:
+                await job_type.handler(job.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self._fail(job_type, job, e)
+            else:
+                # Выполненные задачи не храним: результат уже записан обработчиком
+                async with self.session_factory() as db:
+                    await db.execute(delete(Job).where(Job.id == job.id))
+                    await db.commit()
+                job_type.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Состояние задачи не записано; она повторится после истечения аренды
+            logger.error("Ошибка учета задачи %s #%s: %s", job_type.kind, job.id, e)
+        self._claimed.discard(job.id)
+
+    async def _fail(self, job_type: JobType, job, error: Exception) -> None:
+        message = f"{type(error).__name__}: {error}"
+        if job.attempts < job.max_attempts:
+            delay = self.retry_delay(job.attempts)
+            logger.warning(
+                "Задача %s #%s, попытка %s из %s: %s; повтор через %.1f с",
+                job_type.kind,
+                job.id,
+                job.attempts,
+                job.max_attempts,
+                message,
+                delay,
+            )
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == job.id)
+                    .values(
+                        status=JOB_PENDING,
+                        locked_until=None,
+                        run_at=datetime.utcnow() + timedelta(seconds=delay),
+                        last_error=message,
+                    )
+                )
+                await db.commit()
+            job_type.retried += 1
+            return
+
+        logger.error("Задача %s #%s не выполнена: %s", job_type.kind, job.id, message)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(Job)
+                .where(Job.id == job.id)
+                .values(
+                    status=JOB_FAILED,
+                    locked_until=None,
+                    last_error=message,
+                    finished_at=datetime.utcnow(),
+                )
+            )
+            await db.commit()
+        job_type.failed += 1
+        if job_type.on_failure is not None:
+            try:
+                await job_type.on_failure(job.payload)
+            except Exception as e:
+                logger.error(
+                    "Ошибка обработки отказа задачи %s #%s: %s",
+                    job_type.kind,
+                    job.id,
+                    e,
+                )
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            job_type.kind: {
+                "running": len(job_type.running),
+                "concurrency": job_type.concurrency,
+                "completed": job_type.completed,
+                "retried": job_type.retried,
+                "failed": job_type.failed,
+            }
+            for job_type in self._types.values()
+        }
+
+
+job_queue = JobQueue(
+    poll_interval=settings.JOB_POLL_INTERVAL,
+    lease=settings.JOB_LEASE_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_base_delay=settings.JOB_RETRY_BASE_DELAY,
+    retry_max_delay=settings.JOB_RETRY_MAX_DELAY,
+    shutdown_timeout=settings.JOB_SHUTDOWN_TIMEOUT,
+)
@@ -1,23 +1,256 @@
+import atexit
 import logging
-from rich.console import Console
-from rich.logging import RichHandler
+import queue
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from config import settings
 from .singleton import SingletonMeta
 
+ACCESS_LOGGER = "participant_app.access"
+
+# Идентификатор текущего HTTP-запроса; попадает в каждую запись журнала
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Атрибуты LogRecord; все остальные поля записи считаются переданными через extra
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись request_id; выполняется в потоке, где вызван логгер."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничивает частоту записей из одного места кода: не больше rate записей
+    за interval секунд. Число отброшенных записей добавляется в поле suppressed
+    первой записи из того же места в следующем окне.
+    """
+
+    def __init__(self, rate: int, interval: float, exempt: Tuple[str, ...] = ()):
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        self.exempt = exempt
+        # (путь, строка) -> [начало окна, записей в окне, отброшено]
+        self._windows: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.name in self.exempt:
+            return True
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.rate:
+                window[1] += 1
+                suppressed = 0
+            else:
+                window[2] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись: время, уровень, логгер, сообщение и поля из extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладет запись в ограниченную очередь и сразу возвращается; запись в поток
+    вывода выполняет QueueListener в отдельном потоке. При переполнении очереди
+    запись отбрасывается, а не блокирует event loop.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Сообщение и исключение форматируются сразу: аргументы могут измениться
+        # до того, как запись обработает поток вывода
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
 
 class AppLogger(metaclass=SingletonMeta):
+    """
+    Логгер приложения. LOG_FORMAT="rich" — цветной вывод в консоль (разработка),
+    "json" — JSON-строки в stdout через очередь и отдельный поток (production).
+    """
+
     _logger = None
 
     def __init__(self):
         self._logger = logging.getLogger("participant_app")
-        self._logger.setLevel(logging.INFO)
+        self._logger.setLevel(settings.LOG_LEVEL)
+        self._listener: Optional[QueueListener] = None
+        self.queue_handler: Optional[NonBlockingQueueHandler] = None
 
-        # Настройка rich-форматирования для логов
-        console_handler = RichHandler(console=Console())
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        rate_limit = RateLimitFilter(
+            settings.LOG_RATE_LIMIT,
+            settings.LOG_RATE_LIMIT_INTERVAL,
+            exempt=(ACCESS_LOGGER,),
         )
-        console_handler.setFormatter(formatter)
-        self._logger.addHandler(console_handler)
+        if settings.LOG_FORMAT == "json":
+            self._configure_json(rate_limit)
+        elif settings.LOG_FORMAT == "rich":
+            # Настройка rich-форматирования для логов; rich нужен только в этом режиме
+            from rich.console import Console
+            from rich.logging import RichHandler
+
+            console_handler = RichHandler(console=Console())
+            formatter = logging.Formatter(
+                "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+            )
+            console_handler.setFormatter(formatter)
+            console_handler.addFilter(rate_limit)
+            self._logger.addHandler(console_handler)
+        else:
+            raise ValueError(f"Неизвестный формат журнала: {settings.LOG_FORMAT}")
+
+        for name, level in settings.LOG_LEVELS.items():
+            logging.getLogger(name).setLevel(level.upper())
+
+    def _configure_json(self, rate_limit: RateLimitFilter) -> None:
+        # Обработчик вешается на корневой логгер: туда же попадают записи
+        # SQLAlchemy, uvicorn и сторонних библиотек
+        output = logging.StreamHandler()
+        output.setFormatter(JsonFormatter())
+        log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+        self.queue_handler = NonBlockingQueueHandler(log_queue)
+        self.queue_handler.addFilter(RequestIdFilter())
+        self.queue_handler.addFilter(rate_limit)
+
+        root = logging.getLogger()
+        root.setLevel(settings.LOG_LEVEL)
+        root.addHandler(self.queue_handler)
+
+        self._listener = QueueListener(log_queue, output, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self) -> None:
+        """Дописывает записи из очереди и останавливает поток вывода."""
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
 
     def get_logger(self):
         return self._logger
+
+
+class RequestLoggingMiddleware:
+    """
+    ASGI-middleware журнала доступа: назначает запросу идентификатор (или берет
+    его из заголовка X-Request-ID), возвращает его в ответе и пишет запись
+    с методом, маршрутом, статусом и длительностью. Обычные запросы пишутся
+    с вероятностью sample_rate; ошибки и медленные запросы — всегда.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, slow_ms: float = 1000.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.logger = logging.getLogger(ACCESS_LOGGER)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            if (
+                status_code >= 500
+                or duration_ms >= self.slow_ms
+                or random.random() < self.sample_rate
+            ):
+                route = scope.get("route")
+                self.logger.info(
+                    "%s %s %s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={
+                        "method": scope["method"],
+                        "route": getattr(route, "path", "unmatched"),
+                        "status": status_code,
+                        "duration_ms": round(duration_ms, 2),
+                    },
+                )
+            request_id_var.reset(token)
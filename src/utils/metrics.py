@@ -0,0 +1,307 @@
+import re
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+# Границы корзин гистограмм по умолчанию, в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric(ABC):
+    """Метрика с метками; значения хранятся по кортежу значений меток."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Строки значений метрики в текстовом формате Prometheus."""
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self._values: Dict[Tuple[str, ...], float] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._labels(key)} {value}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        # По метке: счетчики корзин (последняя — +Inf), сумма и количество
+        self._values: Dict[Tuple[str, ...], List] = {}
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Измеряет время выполнения блока."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            ]
+        lines = []
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                labels = self._labels(key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+class CacheCounter(Metric):
+    """
+    Счетчик кэшей AsyncTTLCache с меткой cache: значения не копируются, а
+    читаются из атрибута attribute каждого отслеживаемого кэша при выдаче.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, attribute: str):
+        self.attribute = attribute
+        super().__init__(name, documentation, ("cache",))
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._labels((cache.name,))} {getattr(cache, self.attribute)}"
+            for cache in list(_caches)
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+# HTTP
+http_requests = Counter(
+    "http_requests_total", "Количество HTTP-запросов", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Количество обрабатываемых HTTP-запросов", ("method",)
+)
+
+# База данных
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса по виду запроса",
+    ("statement",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+db_rows = Counter(
+    "db_rows_total",
+    "Строки, обработанные SQL-запросами, по rowcount драйвера",
+    ("statement",),
+)
+db_pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание свободного соединения в пуле",
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+# Кэши: экземпляры AsyncTTLCache добавляются через track_cache
+_caches: "weakref.WeakSet" = weakref.WeakSet()
+cache_hits = CacheCounter("cache_hits_total", "Попадания в кэш", "hits")
+cache_misses = CacheCounter("cache_misses_total", "Промахи кэша", "misses")
+cache_evictions = CacheCounter(
+    "cache_evictions_total",
+    "Записи, вытесненные из кэша по TTL или размеру",
+    "evictions",
+)
+
+
+def track_cache(cache) -> None:
+    """Добавляет кэш в метрики cache_*_total; кэш не удерживается от сборки мусора."""
+    _caches.add(cache)
+
+
+# Тяжелые операции
+image_processing_duration = Histogram(
+    "image_processing_duration_seconds",
+    "Обработка аватара, включая ожидание в очереди пула",
+    ("operation",),
+)
+geocoding_duration = Histogram(
+    "geocoding_duration_seconds", "Получение координат по названию города"
+)
+password_hash_duration = Histogram(
+    "password_hash_duration_seconds",
+    "Хэширование и проверка паролей, включая ожидание в пуле",
+    ("operation",),
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время обработки и количество запросов по шаблону маршрута
+    (например, /api/clients/{id}/match), чтобы число меток оставалось ограниченным.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method=method)
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method=method)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(
+                time.perf_counter() - started_at, method=method, route=path
+            )
+            http_requests.inc(method=method, route=path, status=status_code)
+
+
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+\"?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """Вид запроса для метки: операция и первая таблица, например "SELECT participants"."""
+    words = statement.split(None, 1)
+    if not words:
+        return "unknown"
+    operation = words[0].upper()
+    match = _STATEMENT_TABLE.search(statement)
+    return f"{operation} {match.group(1)}" if match else operation
+
+
+def instrument_engine(sync_engine) -> None:
+    """Подключает к движку SQLAlchemy замер времени запросов и количества строк."""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        context.metrics_started_at = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.metrics_started_at
+        shape = statement_shape(statement)
+        db_query_duration.observe(elapsed, statement=shape)
+        # Драйвер может не знать число строк SELECT до выборки и вернуть -1
+        rows = cursor.rowcount
+        if rows is not None and rows > 0:
+            db_rows.inc(rows, statement=shape)
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Кодирует позицию (created_at, id) в непрозрачный курсор."""
+    payload = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Декодирует курсор в (created_at, id). Бросает ValueError для некорректного курсора."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Некорректный курсор") from e
+
+
+def next_cursor(
+    items: Sequence[T], limit: int, key: Callable[[T], Tuple[datetime, int]]
+) -> Tuple[List[T], Optional[str]]:
+    """
+    Обрезает выборку из limit + 1 элементов до страницы и возвращает курсор
+    следующей страницы, если она есть.
+    """
+    page = list(items[:limit])
+    if len(items) <= limit or not page:
+        return page, None
+    return page, encode_cursor(*key(page[-1]))
+
+
+def paginate_sorted(
+    items: Sequence[T],
+    key: Callable[[T], Tuple[datetime, int]],
+    limit: int,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    descending: bool = False,
+) -> Tuple[List[T], Optional[str]]:
+    """Keyset-пагинация по уже загруженной коллекции (например, результатам поиска по расстоянию)."""
+    ordered = sorted(items, key=key, reverse=descending)
+    if cursor is not None:
+        if descending:
+            ordered = [item for item in ordered if key(item) < cursor]
+        else:
+            ordered = [item for item in ordered if key(item) > cursor]
+    return next_cursor(ordered[: limit + 1], limit, key)
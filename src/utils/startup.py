@@ -0,0 +1,8 @@
+"""
+Отсчет времени холодного старта. Модуль импортируется первым в app.py, поэтому
+IMPORT_STARTED_AT отмечает начало импорта приложения.
+"""
+
+import time
+
+IMPORT_STARTED_AT = time.perf_counter()
@@ -0,0 +1,84 @@
+"""
+Версии изменений таблиц для условных запросов и кэширования ответов.
+
+Версия таблицы — счетчик в таблице table_versions, который увеличивается в той
+же транзакции, что и изменение данных, поэтому общий для всех процессов и
+реплицируется вместе с данными. Процесс кэширует прочитанную версию на ttl
+секунд отдельно для каждой базы (основной и реплик): в это время ETag
+вычисляется без обращения к базе, а изменения из других процессов становятся
+видны не позже чем через ttl.
+"""
+
+import time
+from typing import Dict, Hashable, Tuple
+
+from sqlalchemy import Column, Integer, String, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from db import Base
+
+PARTICIPANTS_VERSION = "participants"
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ChangeVersions:
+    """Чтение и увеличение версий таблиц с кэшем в памяти процесса."""
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        # (база сессии, имя) -> (момент устаревания, версия)
+        self._cached: Dict[Tuple[Hashable, str], Tuple[float, int]] = {}
+        self.reads = 0
+
+    async def get(self, db: AsyncSession, name: str) -> int:
+        """
+        Текущая версия таблицы в базе сессии db. Версия читается через ту же
+        сессию, что и данные, поэтому не опережает данные на отстающей реплике.
+        """
+        key = (db.get_bind(), name)
+        cached = self._cached.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        self.reads += 1
+        result = await db.execute(
+            select(TableVersion.version).where(TableVersion.name == name)
+        )
+        version = result.scalar_one_or_none() or 0
+        self._cached[key] = (time.monotonic() + self.ttl, version)
+        return version
+
+    async def bump(self, db: AsyncSession, name: str) -> None:
+        """
+        Увеличивает версию в транзакции сессии db; вызывается перед коммитом
+        изменения. Строка версии блокируется до коммита, поэтому вызов
+        выполняется последним запросом транзакции.
+        """
+        if db.get_bind().dialect.name == "postgresql":
+            insert = postgresql.insert
+        else:
+            insert = sqlite.insert
+        await db.execute(
+            insert(TableVersion)
+            .values(name=name, version=1)
+            .on_conflict_do_update(
+                index_elements=[TableVersion.name],
+                set_={"version": TableVersion.version + 1},
+            )
+        )
+        # Процесс, выполнивший запись, перечитает версию при следующем запросе
+        for key in [key for key in self._cached if key[1] == name]:
+            del self._cached[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self._cached), "reads": self.reads}
+
+
+change_versions = ChangeVersions(ttl=settings.CHANGE_VERSION_TTL)